@@ -0,0 +1,324 @@
+"""Microbenchmarks of the per-page and per-record hot paths, compared to a baseline."""  # noqa: INP001  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import sys
+import timeit
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+import requests
+from singer_sdk.helpers.jsonpath import extract_jsonpath
+from singer_sdk.io_base import SingerWriter
+from singer_sdk.singerlib import RecordMessage
+
+from tap_sigma.client import SigmaPaginator, SigmaStringPagePaginator
+from tap_sigma.tap import TapSigma
+from tap_sigma.workers import get_parse_pool, parse_page, shutdown_parse_pools
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from tap_sigma.client import SigmaStream
+
+    #: A function to time, and the number of pages or records it processes per call
+    Benchmark = tuple[Callable[[], object], int]
+
+BASELINE_PATH = Path(__file__).parent / "benchmarks" / "baseline.json"
+DEFAULT_TOLERANCE = 0.25
+REPEAT = 5
+
+#: Pages decoded by the parse pool at the same time, as with `prefetch_pages`
+PAGES_IN_FLIGHT = 4
+
+CONFIG = {
+    "api_url": "https://aws-api.sigmacomputing.com",
+    "client_id": "benchmark",
+    "client_secret": "benchmark",
+}
+
+SAMPLE_RECORDS: dict[str, list[dict[str, Any]]] = {
+    "data_model_sources": [
+        {"type": "data-model", "dataModelId": "dm-1", "elementIds": ["e1"]},
+        {"type": "dataset", "datasetId": "ds-1", "elementIds": ["e2"]},
+        {"type": "table", "tableId": "t-1", "elementIds": ["e3", "e4"]},
+        {"type": "custom-sql", "customSqlId": "sql-1", "connectionId": "c-1"},
+    ],
+    "workbook_sources": [
+        {"type": "data-model", "dataModelId": "dm-1", "elementIds": ["e1"]},
+        {"type": "dataset", "inodeId": "ds-1", "elementIds": ["e2"]},
+        {"type": "table", "inodeId": "t-1", "elementIds": ["e3", "e4"]},
+    ],
+    "workbooks": [
+        {
+            "workbookId": "0f5b4c2e-1a2b-4c3d-8e9f-0a1b2c3d4e5f",
+            "workbookUrlId": "5TqlvW2lYh4wZ9n0kE1Jx",
+            "name": "Quarterly revenue",
+            "url": "https://app.sigmacomputing.com/acme/workbook/5TqlvW2lYh4wZ9n0kE1Jx",
+            "path": "Finance/Reports",
+            "latestVersion": 42,
+            "ownerId": "m-1",
+            "createdBy": "m-1",
+            "updatedBy": "m-2",
+            "createdAt": "2024-01-02T03:04:05.678Z",
+            "updatedAt": "2024-06-07T08:09:10.111Z",
+            "isArchived": False,
+            "tags": [{"versionTagId": "vt-1", "name": "Production"}],
+            "description": "Revenue by region and quarter",
+        },
+    ],
+    "workbook_columns": [
+        {
+            "workbookId": "0f5b4c2e-1a2b-4c3d-8e9f-0a1b2c3d4e5f",
+            "elementId": "Ab12Cd34Ef",
+            "columnId": "inode-2Xy/REVENUE",
+            "label": "Revenue",
+            "formula": "Sum([ORDERS/Amount])",
+        },
+    ],
+    "connections": [
+        {
+            "organizationId": "org-1",
+            "connectionId": "c-1",
+            "isSample": False,
+            "isAuditLog": False,
+            "lastActiveAt": "2024-06-07T08:09:10.111Z",
+            "name": "Snowflake",
+            "type": "snowflake",
+            "useOauth": False,
+            "createdBy": "m-1",
+            "updatedBy": "m-2",
+            "createdAt": "2024-01-02T03:04:05.678Z",
+            "updatedAt": "2024-06-07T08:09:10.111Z",
+            "isArchived": False,
+            "account": "acme",
+            "warehouse": "COMPUTE_WH",
+            "user": "SIGMA",
+            "role": "SIGMA_ROLE",
+            "timeout": 900,
+            "writeAccess": True,
+        },
+    ],
+}
+
+
+def _records(stream_name: str, count: int) -> list[dict[str, Any]]:
+    sample = SAMPLE_RECORDS[stream_name]
+    return [dict(sample[i % len(sample)]) for i in range(count)]
+
+
+def _page_response(entries: list[dict[str, Any]], next_page: Any) -> requests.Response:  # noqa: ANN401
+    response = requests.Response()
+    response._content = json.dumps({"entries": entries, "nextPage": next_page}).encode()  # noqa: SLF001
+    return response
+
+
+def _paginator_get_next(_: TapSigma, page_size: int) -> Benchmark:
+    response = _page_response(_records("workbook_columns", page_size), "2")
+    paginator = SigmaPaginator()
+    return lambda: paginator.get_next(response), 1
+
+
+def _string_paginator_get_next(_: TapSigma, page_size: int) -> Benchmark:
+    response = _page_response(_records("workbook_columns", page_size), "token")
+    paginator = SigmaStringPagePaginator(start_value=None)
+    return lambda: paginator.get_next(response), 1
+
+
+def _extract_entries(_: TapSigma, page_size: int) -> Benchmark:
+    response = _page_response(_records("workbook_columns", page_size), None)
+    return lambda: list(extract_jsonpath("$.entries[*]", response.json())), page_size
+
+
+def _parse_pool(_: TapSigma, page_size: int) -> Benchmark:
+    """Decode pages in the `parse_workers` pool, several at a time.
+
+    Compare with `extract_entries`: the pool only pays off on a machine with spare cores.
+    """
+    pool = get_parse_pool(max(os.cpu_count() or 1, 2), CONFIG)
+    body = json.dumps({"entries": _records("workbook_columns", page_size)}).encode()
+
+    def parse_pages() -> list[list[dict]]:
+        futures = [
+            pool.submit(parse_page, "workbook_columns", body, (), None)
+            for _ in range(PAGES_IN_FLIGHT)
+        ]
+        return [future.result() for future in futures]
+
+    # Start the workers before timing
+    parse_pages()
+    return parse_pages, page_size * PAGES_IN_FLIGHT
+
+
+def _parse_pool_result(_: TapSigma, page_size: int) -> Benchmark:
+    """Receive a page decoded by the pool: the share of its parsing left to the main process."""
+    payload = pickle.dumps(_records("workbook_columns", page_size), pickle.HIGHEST_PROTOCOL)
+    return lambda: pickle.loads(payload), page_size  # noqa: S301
+
+
+def _data_model_sources_post_process(row: dict[str, Any]) -> dict[str, Any] | None:
+    """Per-record transform replaced by `DatamodelSourcesStream.transform_page`."""
+    match row.get("type"):
+        case "data-model":
+            row["sourceDataModelId"] = row["dataModelId"]
+            row["_sdc_source_id"] = row["dataModelId"]
+        case "dataset":
+            row["sourceDatasetId"] = row["datasetId"]
+            row["_sdc_source_id"] = row["datasetId"]
+        case "table":
+            row["sourceTableId"] = row["tableId"]
+            row["_sdc_source_id"] = row["tableId"]
+        case "custom-sql":
+            row["sourceCustomSqlId"] = row["customSqlId"]
+            row["_sdc_source_id"] = row["customSqlId"]
+        case _:
+            return None
+
+    return row
+
+
+def _workbook_sources_post_process(row: dict[str, Any]) -> dict[str, Any] | None:
+    """Per-record transform replaced by `WorkbookSourcesStream.transform_page`."""
+    source_type = row["type"]
+    if data_model_id := row.pop("dataModelId", None):
+        row["sourceDataModelId"] = data_model_id
+        row["_sdc_source_id"] = data_model_id
+    if inode_id := row.pop("inodeId", None):
+        key = "sourceDatasetId" if source_type == "dataset" else "sourceTableId"
+        row[key] = inode_id
+        row["_sdc_source_id"] = inode_id
+
+    return row
+
+
+def _post_process(
+    stream_name: str,
+    post_process: Callable[[dict[str, Any]], dict[str, Any] | None],
+) -> Callable[[TapSigma, int], Benchmark]:
+    def build(_: TapSigma, page_size: int) -> Benchmark:
+        def process_page() -> list[dict[str, Any]]:
+            processed = (post_process(record) for record in _records(stream_name, page_size))
+            return [record for record in processed if record is not None]
+
+        return process_page, page_size
+
+    return build
+
+
+def _transform_page(stream_name: str) -> Callable[[TapSigma, int], Benchmark]:
+    def build(tap: TapSigma, page_size: int) -> Benchmark:
+        stream = cast("SigmaStream", tap.streams[stream_name])
+        # Records are copied on every call, since transforms update them in place
+        return lambda: stream.transform_page(_records(stream_name, page_size), None), page_size
+
+    return build
+
+
+def _conform(stream_name: str) -> Callable[[TapSigma, int], Benchmark]:
+    def build(tap: TapSigma, _: int) -> Benchmark:
+        stream = tap.streams[stream_name]
+        record = SAMPLE_RECORDS[stream_name][0]
+        return lambda: list(stream._generate_record_messages(dict(record))), 1  # noqa: SLF001
+
+    return build
+
+
+def _serialize_record(_: TapSigma, __: int) -> Benchmark:
+    writer = SingerWriter()
+    message = RecordMessage(stream="workbooks", record=SAMPLE_RECORDS["workbooks"][0])
+    return lambda: writer.serialize_message(message), 1
+
+
+#: Benchmarks by name, with the unit of their results
+BENCHMARKS: dict[str, tuple[Callable[[TapSigma, int], Benchmark], str]] = {
+    "paginator_get_next": (_paginator_get_next, "ns/page"),
+    "string_paginator_get_next": (_string_paginator_get_next, "ns/page"),
+    "extract_entries": (_extract_entries, "ns/record"),
+    "parse_pool": (_parse_pool, "ns/record"),
+    "parse_pool_result": (_parse_pool_result, "ns/record"),
+    "post_process_data_model_sources": (
+        _post_process("data_model_sources", _data_model_sources_post_process),
+        "ns/record",
+    ),
+    "transform_data_model_sources": (_transform_page("data_model_sources"), "ns/record"),
+    "post_process_workbook_sources": (
+        _post_process("workbook_sources", _workbook_sources_post_process),
+        "ns/record",
+    ),
+    "transform_workbook_sources": (_transform_page("workbook_sources"), "ns/record"),
+    "conform_workbooks": (_conform("workbooks"), "ns/record"),
+    "conform_workbook_columns": (_conform("workbook_columns"), "ns/record"),
+    "conform_connections": (_conform("connections"), "ns/record"),
+    "serialize_record": (_serialize_record, "ns/record"),
+}
+
+
+def run(page_size: int) -> dict[str, float]:
+    """Return the best time of each benchmark, in nanoseconds per page or record."""
+    tap = TapSigma(config=CONFIG, validate_config=False)
+    results = {}
+    try:
+        for name, (build, _) in BENCHMARKS.items():
+            function, operations = build(tap, page_size)
+            timer = timeit.Timer(function)
+            number, _ = timer.autorange()
+            best = min(timer.repeat(repeat=REPEAT, number=number))
+            results[name] = round(best / number / operations * 1e9, 1)
+    finally:
+        shutdown_parse_pools()
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float) -> bool:
+    """Print the results next to the baseline, and return whether none regressed."""
+    passed = True
+    for name, value in results.items():
+        unit = BENCHMARKS[name][1]
+        if (reference := baseline.get(name)) is None:
+            print(f"{name:32} {value:>12.1f} {unit:10} (no baseline)")  # noqa: T201
+            continue
+
+        change = value / reference - 1
+        regressed = change > tolerance
+        passed &= not regressed
+        print(  # noqa: T201
+            f"{name:32} {value:>12.1f} {unit:10} {change:+7.1%} vs {reference:.1f}"
+            f"{'  REGRESSION' if regressed else ''}",
+        )
+    return passed
+
+
+def main() -> None:
+    """Run the benchmarks, save them as the baseline or compare them to it."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["run", "save", "compare"])
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    results = run(args.page_size)
+    if args.command == "save":
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps(
+                {"python": platform.python_version(), "page_size": args.page_size, **results},
+                indent=2,
+            )
+            + "\n",
+        )
+        print(f"Saved {len(results)} benchmarks to {args.baseline}")  # noqa: T201
+        return
+
+    baseline = json.loads(args.baseline.read_text()) if args.command == "compare" else {}
+    if not compare(results, baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 """Authentication handler for Sigma Computing API."""  # ruff: ignore[CPY001]
 
 import sys
+import threading
+from collections.abc import Mapping
 from typing import Any
 
 if sys.version_info >= (3, 12):
@@ -9,10 +11,12 @@ else:
     from typing_extensions import override
 
 
-from singer_sdk.authenticators import OAuthAuthenticator, SingletonMeta
+from singer_sdk.authenticators import OAuthAuthenticator
 
+from tap_sigma.transport import configure_session
 
-class SigmaAuthenticator(OAuthAuthenticator, metaclass=SingletonMeta):
+
+class SigmaAuthenticator(OAuthAuthenticator):
     """Authenticator for Sigma Computing API using OAuth 2.0 client credentials."""
 
     @override
@@ -22,6 +26,7 @@ class SigmaAuthenticator(OAuthAuthenticator, metaclass=SingletonMeta):
         client_secret: str,
         auth_endpoint: str,
         oauth_scopes: str | None = None,
+        transport: Mapping[str, Any] | None = None,
     ) -> None:
         """Initialize authenticator.
 
@@ -30,6 +35,7 @@ class SigmaAuthenticator(OAuthAuthenticator, metaclass=SingletonMeta):
             client_secret: The client secret for the Sigma Computing API.
             auth_endpoint: The OAuth endpoint for token requests.
             oauth_scopes: Optional OAuth scopes.
+            transport: HTTP transport settings of token requests.
         """
         super().__init__(
             auth_endpoint=auth_endpoint,
@@ -38,6 +44,12 @@ class SigmaAuthenticator(OAuthAuthenticator, metaclass=SingletonMeta):
             oauth_scopes=oauth_scopes,
         )
         self._token_expires_at: float | None = None
+        if transport:
+            configure_session(
+                self._session,
+                transport,
+                max_retries=self._session.get_adapter(auth_endpoint).max_retries,
+            )
 
     @property
     @override
@@ -53,3 +65,34 @@ class SigmaAuthenticator(OAuthAuthenticator, metaclass=SingletonMeta):
             "client_id": self.client_id,
             "client_secret": self.client_secret,
         }
+
+
+_AUTHENTICATORS: dict[tuple[str, str], SigmaAuthenticator] = {}
+_AUTHENTICATORS_LOCK = threading.Lock()
+
+
+def get_authenticator(
+    client_id: str,
+    client_secret: str,
+    auth_endpoint: str,
+    transport: Mapping[str, Any] | None = None,
+) -> SigmaAuthenticator:
+    """Return the authenticator shared by every stream of the same org.
+
+    Args:
+        client_id: The client ID for the Sigma Computing API.
+        client_secret: The client secret for the Sigma Computing API.
+        auth_endpoint: The OAuth endpoint for token requests.
+        transport: HTTP transport settings of token requests.
+    """
+    key = (auth_endpoint, client_id)
+    with _AUTHENTICATORS_LOCK:
+        authenticator = _AUTHENTICATORS.get(key)
+        if authenticator is None or authenticator.client_secret != client_secret:
+            authenticator = _AUTHENTICATORS[key] = SigmaAuthenticator(
+                client_id=client_id,
+                client_secret=client_secret,
+                auth_endpoint=auth_endpoint,
+                transport=transport,
+            )
+        return authenticator
@@ -0,0 +1,102 @@
+"""Circuit breakers skipping the contexts of failing endpoints."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+
+DEFAULT_BREAKER_WINDOW = 20
+DEFAULT_PROBE_INTERVAL = 60
+
+
+class CircuitOpenError(Exception):
+    """The circuit breaker of an endpoint is open, so its request was not sent."""
+
+
+class CircuitBreaker:
+    """Stop requesting an endpoint once too many of its recent requests failed.
+
+    The circuit opens when the share of failures among the last `window` requests
+    reaches `error_rate`. While it is open, requests are rejected without being sent,
+    except for a single probe every `probe_interval` seconds: the circuit closes as
+    soon as a probe succeeds.
+    """
+
+    def __init__(
+        self,
+        error_rate: float,
+        window: int = DEFAULT_BREAKER_WINDOW,
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+    ) -> None:
+        """Initialize the breaker.
+
+        Args:
+            error_rate: Share of failed requests opening the circuit.
+            window: Number of most recent requests the error rate is computed over.
+            probe_interval: Number of seconds between probes of an open circuit.
+        """
+        self.error_rate = error_rate
+        self.probe_interval = probe_interval
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._opened_at: float | None = None
+        self._probing = False
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Whether requests to the endpoint are currently rejected."""
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent, counting rejected requests."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._probing and time.monotonic() - self._opened_at >= self.probe_interval:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, *, success: bool) -> None:
+        """Record the outcome of a request sent to the endpoint."""
+        with self._lock:
+            if self._opened_at is not None:
+                if not self._probing:
+                    # A request sent before the circuit opened
+                    return
+                self._probing = False
+                if success:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = time.monotonic()
+                return
+
+            self._outcomes.append(success)
+            if len(self._outcomes) < (self._outcomes.maxlen or 0):
+                return
+            failures = self._outcomes.count(False)
+            if failures / len(self._outcomes) >= self.error_rate:
+                self._opened_at = time.monotonic()
+                self.trips += 1
+
+
+_BREAKERS: dict[tuple[str, str, str], CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(
+    key: tuple[str, str, str],
+    error_rate: float,
+    window: int = DEFAULT_BREAKER_WINDOW,
+    probe_interval: float = DEFAULT_PROBE_INTERVAL,
+) -> CircuitBreaker:
+    """Return the breaker shared by every request to an endpoint of an org."""
+    with _BREAKERS_LOCK:
+        if key not in _BREAKERS:
+            _BREAKERS[key] = CircuitBreaker(error_rate, window, probe_interval)
+        return _BREAKERS[key]
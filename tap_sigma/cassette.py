@@ -0,0 +1,173 @@
+"""Recording and offline replay of the API responses of a sync."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import codecs
+import datetime as dt
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from tap_sigma.spool import READ_CHUNK_SIZE, spooled_body
+
+if TYPE_CHECKING:
+    from typing import TextIO
+
+
+CassetteMode = Literal["record", "replay"]
+
+#: Query parameters never written to a cassette
+SCRUBBED_PARAMS = frozenset({"access_token", "client_id", "client_secret", "token"})
+
+#: Response headers kept in a cassette
+RECORDED_HEADERS = ("Content-Type",)
+
+
+class CassetteError(Exception):
+    """No response was recorded for a replayed request."""
+
+
+def scrub_url(url: str) -> str:
+    """Remove credentials from the query string of a URL."""
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key not in SCRUBBED_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class Cassette:
+    """A gzip-compressed JSON Lines file of API requests and their responses.
+
+    Only the method and scrubbed URL of requests are recorded, never their headers,
+    so access tokens and client credentials stay out of the cassette. OAuth token
+    requests are not recorded either, and are skipped during replay.
+    """
+
+    def __init__(self, path: str | Path, mode: CassetteMode, *, latency: bool = False) -> None:
+        """Open the cassette.
+
+        Args:
+            path: Path of the cassette file.
+            mode: Whether to record responses or replay recorded ones.
+            latency: Whether replayed responses wait for their recorded duration.
+        """
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._file: TextIO | None = None
+        self._responses: dict[tuple[str, str], deque[dict[str, Any]]] = defaultdict(deque)
+
+        if mode == "replay":
+            with gzip.open(self.path, "rt", encoding="utf-8") as file:
+                for line in file:
+                    entry = json.loads(line)
+                    self._responses[entry["method"], entry["url"]].append(entry)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self.path, "wt", encoding="utf-8")  # noqa: SIM115
+
+    @property
+    def closed(self) -> bool:
+        """Whether a recorded cassette was already written."""
+        return self.mode == "record" and self._file is None
+
+    @property
+    def replaying(self) -> bool:
+        """Whether responses are served from the cassette."""
+        return self.mode == "replay"
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response) -> None:
+        """Append a request and its response to the cassette.
+
+        A body spooled to disk is copied to the cassette a chunk at a time, without
+        loading it in memory.
+        """
+        entry = {
+            "method": request.method,
+            "url": scrub_url(str(request.url)),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                name: response.headers[name]
+                for name in RECORDED_HEADERS
+                if name in response.headers
+            },
+            "elapsed_ms": int(response.elapsed.total_seconds() * 1000),
+        }
+        body = spooled_body(response)
+        if body is None:
+            entry["body"] = response.text
+        with self._lock:
+            if self._file is None:
+                msg = f"Cassette {self.path} is closed"
+                raise CassetteError(msg)
+            line = json.dumps(entry, separators=(",", ":"))
+            if body is None:
+                self._file.write(line + "\n")
+                return
+
+            # The body is the last member, written as a JSON string one chunk at a time
+            self._file.write(line[:-1] + ',"body":"')
+            decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")("replace")
+            offset = 0
+            while chunk := body.read_at(offset, READ_CHUNK_SIZE):
+                offset += len(chunk)
+                self._file.write(json.dumps(decoder.decode(chunk))[1:-1])
+            self._file.write(json.dumps(decoder.decode(b"", final=True))[1:-1] + '"}\n')
+
+    def replay(self, request: requests.PreparedRequest) -> requests.Response:
+        """Return the recorded response of a request.
+
+        Responses to the same request are served in the order they were recorded, and
+        the last one is served again to any further identical request.
+        """
+        key = (str(request.method), scrub_url(str(request.url)))
+        with self._lock:
+            entries = self._responses.get(key)
+            if not entries:
+                msg = f"No recorded response for {key[0]} {key[1]} in {self.path}"
+                raise CassetteError(msg)
+            entry = entries.popleft() if len(entries) > 1 else entries[0]
+
+        elapsed = dt.timedelta(milliseconds=entry["elapsed_ms"])
+        if self.latency:
+            time.sleep(elapsed.total_seconds())
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry["reason"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = "utf-8"
+        response.url = str(request.url)
+        response.request = request
+        response.elapsed = elapsed
+        response._content = entry["body"].encode()  # noqa: SLF001
+        return response
+
+    def close(self) -> None:
+        """Finish writing the cassette."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_CASSETTES: dict[str, Cassette] = {}
+_CASSETTES_LOCK = threading.Lock()
+
+
+def get_cassette(path: str, mode: CassetteMode, *, latency: bool = False) -> Cassette:
+    """Return the cassette shared by every org and stream of the process."""
+    with _CASSETTES_LOCK:
+        cassette = _CASSETTES.get(path)
+        if cassette is None or cassette.mode != mode or cassette.closed:
+            cassette = _CASSETTES[path] = Cassette(path, mode, latency=latency)
+        return cassette
@@ -2,15 +2,46 @@
 
 from __future__ import annotations
 
+import hashlib
+import itertools
+import json
+import logging
+import queue
 import sys
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
 from http import HTTPStatus
-from typing import TYPE_CHECKING, Any
-from urllib.parse import urljoin
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+from urllib.parse import urljoin, urlsplit
 
+from singer_sdk.authenticators import APIAuthenticatorBase
+from singer_sdk.batch import Batcher
+from singer_sdk.helpers._util import utc_now
 from singer_sdk.pagination import BaseAPIPaginator
 from singer_sdk.streams import RESTStream
 
-from tap_sigma.auth import SigmaAuthenticator
+from tap_sigma.auth import get_authenticator
+from tap_sigma.breaker import (
+    DEFAULT_BREAKER_WINDOW,
+    DEFAULT_PROBE_INTERVAL,
+    CircuitBreaker,
+    CircuitOpenError,
+    get_circuit_breaker,
+)
+from tap_sigma.hedging import DEFAULT_HEDGE_BUDGET, RequestHedger
+from tap_sigma.record_index import record_hash, record_key
+from tap_sigma.snapshot import DEFAULT_SNAPSHOT_TTL, ParentSnapshot
+from tap_sigma.spool import (
+    get_large_response_slots,
+    get_memory_budget,
+    spool_response,
+    spooled_body,
+)
+from tap_sigma.transport import get_session, transferred_bytes
+from tap_sigma.workers import parse_page
 
 if sys.version_info >= (3, 12):
     from typing import override
@@ -18,20 +49,102 @@ else:
     from typing_extensions import override
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Iterable, Mapping
 
     import requests
-    from singer_sdk.helpers.types import Context
+    from singer_sdk.helpers._batch import BaseBatchFileEncoding, BatchConfig
+    from singer_sdk.helpers.types import Context, Record
+
+    from tap_sigma.progress import StreamProgress
+    from tap_sigma.streams.text_blobs import TextBlobsStream
+    from tap_sigma.tap import TapSigma
 
 
 DEFAULT_PAGE_SIZE = 1000
 
+PREFETCH_POLL_INTERVAL = 0.1
+
+#: Number of records of a spooled response transformed at a time
+SPOOLED_RECORDS_CHUNK_SIZE = 100
+
+DELETED_AT_PROPERTY = "_sdc_deleted_at"
+
+ORG_PROPERTY = "_sdc_org"
+
+DEFAULT_ORG_NAME = "default"
+
+PROGRESS_STATE_KEY = "completed_parents"
+
+PARENT_COSTS_STATE_KEY = "parent_costs"
+
+DEFERRED_STATE_KEY = "deferred"
+
 
 class SkippableAPIError(Exception):
-    """A 4xx API error on a child stream context that should be skipped."""
+    """A 4xx API error on a child stream context or configured ID that should be skipped."""
+
+
+class RateLimiter:
+    """Space out requests to stay within a requests-per-second budget."""
+
+    def __init__(self, requests_per_second: float) -> None:
+        """Initialize rate limiter.
+
+        Args:
+            requests_per_second: Maximum number of requests to send per second.
+        """
+        self.requests_per_second = requests_per_second
+        self._interval = 1 / requests_per_second
+        self._next_request_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the next request may be sent."""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self._interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+_RATE_LIMITERS: dict[tuple[str, str], RateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
 
 
-class SigmaPaginator(BaseAPIPaginator[int]):
+def get_rate_limiter(key: tuple[str, str], requests_per_second: float) -> RateLimiter:
+    """Return the rate limiter shared by every stream requesting the same org."""
+    with _RATE_LIMITERS_LOCK:
+        limiter = _RATE_LIMITERS.get(key)
+        if limiter is None or limiter.requests_per_second != requests_per_second:
+            limiter = _RATE_LIMITERS[key] = RateLimiter(requests_per_second)
+        return limiter
+
+
+def get_response_value(response: requests.Response, key: str) -> Any:  # noqa: ANN401
+    """Return a top-level value of a response, without loading a spooled body in memory."""
+    if (body := spooled_body(response)) is not None:
+        return body.get(key)
+    return response.json().get(key)
+
+
+class PageLimitMixin:
+    """Stop paginating after `max_pages` pages, e.g. in sampling mode."""
+
+    #: Number of pages requested so far, counted by the paginator
+    count: int
+
+    def __init__(self, *args: Any, max_pages: int | None = None, **kwargs: Any) -> None:
+        """Initialize paginator."""
+        super().__init__(*args, **kwargs)
+        self.max_pages = max_pages
+
+    def has_more(self, response: requests.Response) -> bool:  # noqa: ARG002
+        """Return whether fewer than `max_pages` pages were requested."""
+        return self.max_pages is None or self.count < self.max_pages
+
+
+class SigmaPaginator(PageLimitMixin, BaseAPIPaginator[int]):
     """Paginator for Sigma Computing API."""
 
     @override
@@ -43,17 +156,17 @@ class SigmaPaginator(BaseAPIPaginator[int]):
     @override
     def get_next(self, response: requests.Response) -> int | None:
         """Get next page number."""
-        next_page = response.json().get("nextPage")
+        next_page = get_response_value(response, "nextPage")
         return int(next_page) if next_page else None
 
 
-class SigmaStringPagePaginator(BaseAPIPaginator[str | None]):
+class SigmaStringPagePaginator(PageLimitMixin, BaseAPIPaginator[str | None]):
     """Paginator for Sigma Computing API."""
 
     @override
     def get_next(self, response: requests.Response) -> str | None:
         """Get next page number."""
-        return response.json().get("nextPage")
+        return get_response_value(response, "nextPage")
 
 
 class SigmaStream(RESTStream):
@@ -62,16 +175,73 @@ class SigmaStream(RESTStream):
     records_jsonpath = "$.entries[*]"
     default_page_size: int
 
+    #: Config setting holding specific object IDs to fetch instead of listing the endpoint.
+    ids_setting: str | None = None
+
+    #: Properties needed by `post_process` or child contexts, kept even when deselected.
+    required_properties: tuple[str, ...] = ()
+
+    #: Record property used to sync the children of the most recently updated parents
+    #: first when `max_runtime` is set.
+    priority_key: str | None = None
+
+    #: Record property whose first path segment groups parents in sampling mode.
+    sample_group_key: str | None = None
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         """Initialize the stream."""
         super().__init__(*args, **kwargs)
         self._sigma_page_size: int | None = None
+        self._deselected_properties: tuple[str, ...] | None = None
+        self._skipped_parents = 0
+        self._records_read = 0
+        self._deferred_contexts = 0
+        self._sampled_parents: dict[str, int] = {}
+        self._current_parent: str | None = None
+        self._new_parent_costs: dict[str, dict[str, float]] | None = None
+        self._listed_parents: set[str] = set()
+        self._hedger: RequestHedger | None = None
+        self._parsed_pages: weakref.WeakKeyDictionary[
+            requests.Response,
+            Future[list[dict]],
+        ] = weakref.WeakKeyDictionary()
+        self._parsed_pages_lock = threading.Lock()
+
+        extra_properties: dict[str, dict] = {}
+        if self.config.get("detect_deletes"):
+            extra_properties[DELETED_AT_PROPERTY] = {
+                "type": ["string", "null"],
+                "format": "date-time",
+            }
+        if self.org_name is not None:
+            extra_properties[ORG_PROPERTY] = {"type": ["string"]}
+            self.primary_keys = [*self.primary_keys, ORG_PROPERTY]
+
+        if extra_properties:
+            # Shadow the class-level schema (a descriptor or a dict) on this instance
+            schema = self.schema
+            self.__dict__["schema"] = {
+                **schema,
+                "properties": {**schema["properties"], **extra_properties},
+            }
 
     def __init_subclass__(cls, default_page_size: int = DEFAULT_PAGE_SIZE) -> None:
         """Initialize the subclass."""
         cls.default_page_size = default_page_size
         return super().__init_subclass__()
 
+    @property
+    def tap(self) -> TapSigma:
+        """Return the tap this stream belongs to."""
+        return cast("TapSigma", self._tap)
+
+    @property
+    def org_name(self) -> str | None:
+        """Return the name records are tagged with in `_sdc_org`, when syncing many orgs."""
+        if org_name := self.config.get("org_name"):
+            return org_name
+        return DEFAULT_ORG_NAME if self.config.get("orgs") else None
+
     @property
     @override
     def url_base(self) -> str:
@@ -80,28 +250,386 @@ class SigmaStream(RESTStream):
 
     @property
     @override
-    def authenticator(self) -> SigmaAuthenticator:
-        """Return shared authenticator instance to avoid rate limiting."""
-        return SigmaAuthenticator(
+    def authenticator(self) -> APIAuthenticatorBase:
+        """Return the authenticator shared by the streams of this org."""
+        cassette = self.tap.cassette
+        if cassette is not None and cassette.replaying:
+            # Replayed responses need no access token
+            return APIAuthenticatorBase()
+
+        return get_authenticator(
             client_id=self.config["client_id"],
             client_secret=self.config["client_secret"],
             auth_endpoint=urljoin(self.url_base, "/v2/auth/token"),
+            transport=self.config.get("transport"),
         )
 
+    @property
+    @override
+    def requests_session(self) -> requests.Session:
+        """Return the session shared by every stream of this org."""
+        return get_session(
+            (self.url_base, self.config["client_id"]),
+            self.config.get("transport") or {},
+            pool_maxsize=self.tap.pool_maxsize,
+        )
+
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        """Return the shared rate limiter, if `max_requests_per_second` is set."""
+        if requests_per_second := self.config.get("max_requests_per_second"):
+            return get_rate_limiter(
+                (self.url_base, self.config["client_id"]),
+                requests_per_second,
+            )
+        return None
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker | None:
+        """Return the breaker of this stream's endpoint, if `circuit_breaker_error_rate` is set.
+
+        Breakers are keyed on the endpoint template, so every context of a child stream
+        shares the breaker of its endpoint. Top-level streams have no breaker, since
+        they have no other context to move on to.
+        """
+        if self.parent_stream_type is None:
+            return None
+        if error_rate := self.config.get("circuit_breaker_error_rate"):
+            return get_circuit_breaker(
+                (self.url_base, self.config["client_id"], self.path),
+                error_rate,
+                window=self.config.get("circuit_breaker_window", DEFAULT_BREAKER_WINDOW),
+                probe_interval=self.config.get(
+                    "circuit_breaker_probe_interval",
+                    DEFAULT_PROBE_INTERVAL,
+                ),
+            )
+        return None
+
+    @property
+    def progress(self) -> StreamProgress | None:
+        """Return the live progress of this stream, if progress reporting is enabled."""
+        if (reporter := self.tap.progress) is None:
+            return None
+        return reporter.track(self.org_name or DEFAULT_ORG_NAME, self.name)
+
+    @property
+    @override
+    def timeout(self) -> int:
+        """Return the request timeout in seconds, configurable per stream."""
+        return self.stream_options.get("timeout", super().timeout)
+
+    @property
+    def hedger(self) -> RequestHedger | None:
+        """Return the request hedger, if the `hedge_requests` stream option is set."""
+        if self._hedger is None and self.stream_options.get("hedge_requests"):
+            self._hedger = RequestHedger(
+                budget=self.stream_options.get("hedge_budget", DEFAULT_HEDGE_BUDGET),
+                concurrency=1 + max(self.parallel_pages, self.prefetch_pages),
+            )
+        return self._hedger
+
+    def _send(self, request: requests.PreparedRequest) -> requests.Response:
+        if (cassette := self.tap.cassette) is not None and cassette.replaying:
+            return cassette.replay(request)
+
+        if rate_limiter := self.rate_limiter:
+            rate_limiter.wait()
+
+        max_response_memory = self.config.get("max_response_memory")
+        response = self.requests_session.send(
+            request,
+            timeout=self.timeout,
+            allow_redirects=self.allow_redirects,
+            stream=bool(max_response_memory),
+        )
+        if max_response_memory:
+            total_memory = self.config.get("max_total_response_memory")
+            response = spool_response(
+                response,
+                max_memory=max_response_memory,
+                slots=get_large_response_slots(self.config.get("max_large_responses", 1)),
+                budget=get_memory_budget(total_memory) if total_memory else None,
+            )
+        return response
+
+    @override
+    def _request(
+        self,
+        prepared_request: requests.PreparedRequest,
+        context: Context | None,
+    ) -> requests.Response:
+        """Send a request, hedging it when it is slower than the endpoint's p95.
+
+        Only the response which won a hedged race is recorded to the cassette.
+        """
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow():
+            msg = f"Circuit breaker of {self.path} is open"
+            raise CircuitOpenError(msg)
+
+        authenticated_request = self.authenticator(prepared_request)
+        try:
+            if hedger := self.hedger:
+                response = hedger.send(lambda: self._send(authenticated_request))
+            else:
+                response = self._send(authenticated_request)
+        except Exception:
+            # Any error ends a probe, e.g. a request missing from a replayed cassette
+            if breaker is not None:
+                breaker.record(success=False)
+            raise
+
+        if (cassette := self.tap.cassette) is not None and not cassette.replaying:
+            cassette.record(authenticated_request, response)
+        if breaker is not None:
+            status_code = cast("int", response.status_code)
+            breaker.record(success=status_code < HTTPStatus.INTERNAL_SERVER_ERROR)
+        if (progress := self.progress) is not None:
+            progress.add_request()
+
+        self._write_request_duration_log(
+            endpoint=self.path,
+            response=response,
+            context=context,
+            extra_tags={"url": authenticated_request.path_url}
+            if self._LOG_REQUEST_METRIC_URLS
+            else None,
+        )
+        self.validate_response(response)
+        self.submit_page(authenticated_request, response, context)
+        return response
+
+    def submit_page(
+        self,
+        request: requests.PreparedRequest,
+        response: requests.Response,
+        context: Context | None,
+    ) -> None:
+        """Start decoding a page in the `parse_workers` process pool, if enabled.
+
+        Pages are submitted as soon as they are downloaded, so with `parallel_pages` or
+        `prefetch_pages` they are decoded on other cores while earlier pages are
+        processed. Pages fetched one after the other would only wait for their worker,
+        so they are parsed as usual, like spooled bodies and detail requests.
+        """
+        pool = self.tap.parse_pool
+        if pool is None or spooled_body(response) is not None:
+            return
+        if self.parallel_pages <= 1 and self.prefetch_pages <= 0:
+            return
+        if urlsplit(str(request.url)).path != urlsplit(self.get_url(context)).path:
+            return
+
+        future = pool.submit(
+            parse_page,
+            self.name,
+            response.content,
+            self.deselected_properties,
+            dict(context) if context else None,
+        )
+        with self._parsed_pages_lock:
+            self._parsed_pages[response] = future
+
+    @override
+    def calculate_sync_cost(
+        self,
+        request: requests.PreparedRequest,
+        response: requests.Response,
+        context: Context | None,
+    ) -> dict[str, int]:
+        """Count requests, their duration in milliseconds and the bytes received.
+
+        `wire_bytes` are received before content decoding, `body_bytes` after.
+        """
+        return {
+            "requests": 1,
+            "request_ms": int(response.elapsed.total_seconds() * 1000),
+            **transferred_bytes(response),
+        }
+
+    @property
+    def sync_costs(self) -> dict[str, int]:
+        """Return the accumulated sync costs of this stream."""
+        return dict(self._sync_costs)
+
+    @override
+    def log_sync_costs(self) -> None:
+        """Log a summary of sync costs, including hedged requests."""
+        super().log_sync_costs()
+        if self._hedger is not None and self._hedger.hedged:
+            self.log(
+                "Hedged %d of %d requests for stream %s",
+                self._hedger.hedged,
+                self._hedger.requests,
+                self.name,
+            )
+
+    def close(self) -> None:
+        """Release the resources held by the stream once its org is synced."""
+        if self._hedger is not None:
+            self._hedger.close()
+            self._hedger = None
+
     @override
     def get_new_paginator(self) -> BaseAPIPaginator:
         """Get a new paginator."""
-        return SigmaPaginator()
+        return SigmaPaginator(max_pages=self.max_pages)
+
+    @property
+    def sample(self) -> dict[str, Any]:
+        """Return the `sample` settings of a sampled dev or QA run."""
+        return self.config.get("sample") or {}
+
+    @property
+    def max_pages(self) -> int | None:
+        """Return the number of pages requested per context in sampling mode, if capped."""
+        return self.sample.get("max_pages")
+
+    @property
+    def parallel_pages(self) -> int:
+        """Return how many numbered pages are requested at once, per the stream options."""
+        return self.stream_options.get("parallel_pages", 1)
+
+    @property
+    def prefetch_pages(self) -> int:
+        """Return how many pages are requested ahead of processing, per the stream options."""
+        return self.stream_options.get("prefetch_pages", 0)
+
+    @override
+    def request_records(self, context: Context | None) -> Iterable[dict]:
+        """Request records, fetching pages concurrently or in the background when enabled."""
+        if self.parallel_pages > 1 and isinstance(self.get_new_paginator(), SigmaPaginator):
+            yield from self.request_page_ranges(context)
+        elif self.prefetch_pages > 0:
+            yield from self.request_prefetched_pages(context)
+        else:
+            yield from super().request_records(context)
+
+    def request_prefetched_pages(self, context: Context | None) -> Iterable[dict]:
+        """Request the next pages in a background thread while records are processed.
+
+        As soon as a response gives the token of the next page, that page is requested,
+        up to `prefetch_pages` responses ahead of the page being processed.
+        """
+        paginator = self.get_new_paginator()
+        decorated_request = self.request_decorator(self._request)
+        pages: queue.Queue[Any] = queue.Queue(maxsize=self.prefetch_pages)
+        stop = threading.Event()
+
+        def put(item: Any) -> None:  # noqa: ANN401
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=PREFETCH_POLL_INTERVAL)
+                except queue.Full:
+                    continue
+                return
+
+        def fetch_pages() -> None:
+            try:
+                while not paginator.finished and not stop.is_set():
+                    prepared_request = self._prepare_request(context=context, page=paginator)
+                    response = decorated_request(prepared_request, context)
+                    put((prepared_request, response))
+                    paginator.advance(response)
+            except Exception as e:  # noqa: BLE001
+                put(e)
+            put(None)
+
+        fetcher = threading.Thread(
+            target=fetch_pages,
+            name=f"sigma-prefetch-{self.name}",
+            daemon=True,
+        )
+        fetcher.start()
+        try:
+            with self.get_http_request_counter() as request_counter:
+                request_counter.with_context(context)
+                while (item := pages.get()) is not None:
+                    if isinstance(item, Exception):
+                        raise item
+
+                    prepared_request, response = item
+                    request_counter.increment()
+                    self.update_sync_costs(prepared_request, response, context)
+                    records = iter(self.parse_response(response))
+                    if (first_record := next(records, None)) is None:
+                        break
+                    yield first_record
+                    yield from records
+        finally:
+            stop.set()
+            fetcher.join()
+
+    def request_page_ranges(self, context: Context | None) -> Iterable[dict]:
+        """Request page 1, then the following `parallel_pages` pages at a time.
+
+        Records are yielded in page order. Requests stop at the first empty page or when
+        `nextPage` is null, at the cost of up to `parallel_pages - 1` surplus requests.
+        """
+        paginator = SigmaPaginator()
+        decorated_request = self.request_decorator(self._request)
+
+        def fetch(page: int) -> tuple[requests.PreparedRequest, requests.Response]:
+            prepared_request = self._prepare_request(
+                context=context,
+                page=SigmaPaginator(start_value=page),
+            )
+            return prepared_request, decorated_request(prepared_request, context)
+
+        with (
+            self.get_http_request_counter() as request_counter,
+            ThreadPoolExecutor(
+                max_workers=self.parallel_pages,
+                thread_name_prefix=f"sigma-{self.name}",
+            ) as executor,
+        ):
+            request_counter.with_context(context)
+            pages = [paginator.current_value]
+            while pages:
+                futures = [executor.submit(fetch, page) for page in pages]
+                next_page = None
+                for index, page in enumerate(pages):
+                    prepared_request, response = futures[index].result()
+                    request_counter.increment()
+                    self.update_sync_costs(prepared_request, response, context)
+                    records = iter(self.parse_response(response))
+                    first_record = next(records, None)
+                    if first_record is not None:
+                        yield first_record
+                        yield from records
+
+                    next_page = paginator.get_next(response)
+                    if first_record is None or next_page != page + 1:
+                        break
+
+                for future in futures[index + 1 :]:
+                    # Surplus pages past the last one still count as requests
+                    if not future.cancel() and future.exception() is None:
+                        prepared_request, response = future.result()
+                        request_counter.increment()
+                        self.update_sync_costs(prepared_request, response, context)
+
+                pages = (
+                    [
+                        page
+                        for page in range(next_page, next_page + self.parallel_pages)
+                        if self.max_pages is None or page <= self.max_pages
+                    ]
+                    if first_record is not None and next_page is not None
+                    else []
+                )
+
+    @property
+    def stream_options(self) -> dict[str, Any]:
+        """Return the `stream_options` configured for this stream."""
+        return self.config.get("stream_options", {}).get(self.name, {})
 
     @property
     def page_size(self) -> int:
         """Return the page size for the stream."""
         if self._sigma_page_size is None:
-            self._sigma_page_size = (
-                self.config.get("stream_options", {})
-                .get(self.name, {})
-                .get("page_size", self.default_page_size)
-            )
+            self._sigma_page_size = self.stream_options.get("page_size", self.default_page_size)
             self.log("Using page size %s for %s", self._sigma_page_size, self.name)
         return self._sigma_page_size
 
@@ -117,13 +645,599 @@ class SigmaStream(RESTStream):
             "limit": self.page_size,
         }
 
+    @property
+    def deselected_properties(self) -> tuple[str, ...]:
+        """Return the top-level properties deselected in the catalog.
+
+        These are dropped right after extraction, so heavy fields such as SQL text or
+        formulas are never post-processed nor conformed to the schema. Keys, required
+        properties and the property grouping sampled parents are always kept.
+        """
+        if self._deselected_properties is None:
+            mask = self.mask
+            keep = {*self.primary_keys, *self.required_properties}
+            if self.replication_key:
+                keep.add(self.replication_key)
+            if self.sample_group_key:
+                keep.add(self.sample_group_key)
+            self._deselected_properties = (
+                tuple(
+                    name
+                    for name in self.schema.get("properties", {})
+                    if name not in keep and not mask[("properties", name)]
+                )
+                if mask[()]
+                else ()
+            )
+            if self._deselected_properties:
+                self.log(
+                    "Dropping deselected properties %s from %s on extraction",
+                    self._deselected_properties,
+                    self.name,
+                )
+        return self._deselected_properties
+
+    def project_record(self, record: dict) -> dict:
+        """Drop deselected properties from a freshly extracted record."""
+        for name in self.deselected_properties:
+            record.pop(name, None)
+        return record
+
+    def transform_page(
+        self,
+        records: list[dict],
+        context: Context | None,  # noqa: ARG002
+    ) -> list[dict]:
+        """Transform all the records of a page at once, before `post_process`.
+
+        Override to derive fields in a single pass over a page instead of one
+        `post_process` call per record. Records left out of the result are dropped.
+
+        Args:
+            records: Records of a page, without their deselected properties. When the
+                response was spooled to disk, records come in chunks of the page.
+            context: Stream partition or context dictionary.
+
+        Returns:
+            The transformed records.
+        """
+        return records
+
+    @override
+    def parse_response(self, response: requests.Response) -> Iterable[dict]:
+        """Parse the response, dropping deselected properties and transforming the page."""
+        if (body := spooled_body(response)) is not None:
+            return self.parse_spooled_records(body.iter_items("entries"))
+
+        with self._parsed_pages_lock:
+            future = self._parsed_pages.pop(response, None)
+        if future is not None:
+            return future.result()
+
+        records = super().parse_response(response)
+        if self.deselected_properties:
+            records = map(self.project_record, records)
+        return self.transform_page(list(records), self.context)
+
+    def parse_spooled_records(self, records: Iterable[dict]) -> Iterable[dict]:
+        """Parse the records of a response spooled to disk, a chunk at a time."""
+        context = self.context
+        records = iter(records)
+        while chunk := list(itertools.islice(records, SPOOLED_RECORDS_CHUNK_SIZE)):
+            if self.deselected_properties:
+                chunk = [self.project_record(record) for record in chunk]
+            yield from self.transform_page(chunk, context)
+
+    @override
+    def get_batch_config(self, config: Mapping[str, Any]) -> BatchConfig | None:
+        """Return the batch config if this stream emits BATCH messages.
+
+        When any stream sets the `batch` stream option, only those streams are batched.
+        Otherwise, every stream is batched as long as `batch_config` is set.
+        """
+        batch_config = super().get_batch_config(config)
+        if batch_config is None:
+            return None
+
+        if (batch := self.stream_options.get("batch")) is not None:
+            return batch_config if batch else None
+
+        stream_options = config.get("stream_options", {})
+        if any(options.get("batch") for options in stream_options.values()):
+            return None
+
+        return batch_config
+
+    def is_unchanged(self, record: Record) -> bool:
+        """Return whether the record was already emitted, unchanged, by a previous run."""
+        record_index = self.tap.record_index
+        if record_index is None or not self.primary_keys:
+            return False
+        return not record_index.has_changed(
+            self.name,
+            record_key(record, self.primary_keys),
+            record_hash(record),
+            self.context,
+        )
+
+    def write_deletion_markers(self) -> int:
+        """Emit a record flagged with `_sdc_deleted_at` for every key gone since the last run.
+
+        Returns:
+            The number of deleted records.
+        """
+        record_index = self.tap.record_index
+        if record_index is None or not self.primary_keys:
+            return 0
+
+        deleted_at = utc_now().isoformat()
+        deleted = 0
+        for keys in record_index.pop_deleted(self.name):
+            if not deleted:
+                self._write_schema_message()
+            for key in keys:
+                record = dict(zip(self.primary_keys, json.loads(key), strict=False))
+                record[DELETED_AT_PROPERTY] = deleted_at
+                for record_message in self._generate_record_messages(record):
+                    self._tap.write_message(record_message)
+            deleted += len(keys)
+
+        if deleted:
+            self.log("Found %d deleted records in %s", deleted, self.name)
+        return deleted
+
+    def deduplicate_text(self, record: Record) -> Record:
+        """Replace `deduplicate_properties` values with the hash of their text body."""
+        names = self.stream_options.get("deduplicate_properties")
+        if not names:
+            return record
+
+        text_blobs = cast("TextBlobsStream", self.tap.streams["text_blobs"])
+        if not text_blobs.selected:
+            return record
+
+        for name in names:
+            if isinstance(value := record.get(name), str):
+                record[name] = text_blobs.store(value)
+        return record
+
+    @override
+    def _write_record_message(self, record: Record) -> None:
+        """Write a RECORD message, unless the record is unchanged since the last run."""
+        if self.is_unchanged(self.deduplicate_text(record)):
+            return
+        super()._write_record_message(record)
+
+    @override
+    def get_batches(
+        self,
+        batch_config: BatchConfig,
+        context: Context | None = None,
+    ) -> Iterable[tuple[BaseBatchFileEncoding, list[str]]]:
+        """Write batches of the records that changed since the last run."""
+        batcher = Batcher(
+            tap_name=self.tap_name,
+            stream_name=self.name,
+            batch_config=batch_config,
+        )
+        records = (
+            record
+            for record in self._sync_records(context, write_messages=False)
+            if not self.is_unchanged(self.deduplicate_text(record))
+        )
+        for manifest in batcher.get_batches(records=records):
+            yield batch_config.encoding, manifest
+
+    @property
+    def selected_ids(self) -> list[str]:
+        """Return the object IDs configured for a targeted sync, if any."""
+        if self.ids_setting is None:
+            return []
+        return self.config.get(self.ids_setting) or []
+
+    @property
+    def parent_snapshot(self) -> ParentSnapshot | None:
+        """Return the snapshot of this stream's records, if it only lists child contexts.
+
+        Snapshots are only used for unselected top-level parent streams, when
+        `parent_snapshot_dir` is set.
+        """
+        directory = self.config.get("parent_snapshot_dir")
+        if not directory or self.selected or self.parent_stream_type or not self.child_streams:
+            return None
+
+        org_key = hashlib.sha256(
+            f"{self.url_base}|{self.config['client_id']}".encode(),
+        ).hexdigest()[:16]
+        return ParentSnapshot(
+            Path(directory) / f"{self.name}-{org_key}.json",
+            ttl=self.config.get("parent_snapshot_ttl", DEFAULT_SNAPSHOT_TTL),
+        )
+
+    def _list_parents(
+        self,
+        snapshot: ParentSnapshot,
+        context: Context | None,
+    ) -> Iterable[dict[str, Any]]:
+        """List parent records, from a fresh snapshot or the API."""
+        if (records := snapshot.read()) is not None:
+            self.log("Reusing %d %s from %s", len(records), self.name, snapshot.path)
+            yield from records
+            return
+
+        keep = (*self.primary_keys, *self.required_properties)
+        records = []
+        for record in super().get_records(context):
+            records.append({name: record.get(name) for name in keep if name in record})
+            yield record
+        if self.sample:
+            # Sampled listings may be cut short by `max_pages`
+            return
+        snapshot.write(records)
+        self.log("Saved %d %s to %s", len(records), self.name, snapshot.path)
+
+    @override
+    def validate_response(self, response: requests.Response) -> None:
+        """Raise SkippableAPIError when a configured ID is not found."""
+        if self.selected_ids and response.status_code == HTTPStatus.NOT_FOUND:
+            err_msg = f"{response.status_code} {response.reason} for {response.url}"
+            raise SkippableAPIError(err_msg)
+        super().validate_response(response)
+
+    def request_record_by_id(self, record_id: str, context: Context | None) -> dict:
+        """Fetch a single object from the detail endpoint, e.g. `/v2/workbooks/{id}`."""
+        decorated_request = self.request_decorator(self._request)
+        prepared_request = self.build_prepared_request(
+            method="GET",
+            url=f"{self.get_url(context)}/{self._url_encode(record_id)}",
+            headers=self.http_headers,
+        )
+        with self.get_http_request_counter() as request_counter:
+            request_counter.with_context(context)
+            response = decorated_request(prepared_request, context)
+            request_counter.increment()
+        self.update_sync_costs(prepared_request, response, context)
+        return response.json()
+
+    def request_first_page(self, context: Context | None) -> requests.Response:
+        """Request only the first page of a context, e.g. to estimate the size of a listing."""
+        decorated_request = self.request_decorator(self._request)
+        prepared_request = self._prepare_request(context=context, page=self.get_new_paginator())
+        with self.get_http_request_counter() as request_counter:
+            request_counter.with_context(context)
+            response = decorated_request(prepared_request, context)
+            request_counter.increment()
+        self.update_sync_costs(prepared_request, response, context)
+        return response
+
+    def _get_selected_records(self, context: Context | None) -> Iterable[dict[str, Any]]:
+        """Fetch the configured IDs one by one, skipping those which are not found."""
+        ids = self.selected_ids
+        self.log("Fetching %d configured %s by ID", len(ids), self.name)
+        for record_id in ids:
+            try:
+                record = self.request_record_by_id(record_id, context)
+            except SkippableAPIError:
+                self.logger.warning("Skipping %s %s", self.name, record_id, exc_info=True)
+                continue
+            yield from self.transform_page([self.project_record(record)], context)
+
+    def _get_records(self, context: Context | None) -> Iterable[dict[str, Any]]:
+        records: Iterable[dict[str, Any]]
+        if self.selected_ids:
+            records = self._get_selected_records(context)
+        elif (snapshot := self.parent_snapshot) is not None:
+            records = self._list_parents(snapshot, context)
+        else:
+            records = super().get_records(context)
+
+        org_name = self.org_name
+        progress = self.progress
+        for record in records:
+            self._records_read += 1
+            if progress is not None:
+                progress.records += 1
+            if org_name is not None:
+                record[ORG_PROPERTY] = org_name
+            yield record
+
+    @property
+    def is_time_budgeted(self) -> bool:
+        """Whether child contexts are prioritized and resumed under `max_runtime`.
+
+        Sampled runs never record their progress, since their contexts are incomplete.
+        """
+        return (
+            self.priority_key is not None
+            and bool(self.config.get("max_runtime"))
+            and not self.sample
+        )
+
+    @property
+    def completed_parents(self) -> dict[str, Any]:
+        """Return parents whose children were synced by a previous, unfinished run.
+
+        Maps each parent ID to its `priority_key` value at the time it was synced.
+        """
+        return self.stream_state.setdefault(PROGRESS_STATE_KEY, {})
+
+    def prioritize(self, records: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Sort parent records by `priority_ids`, then most recently updated first."""
+        rank = {parent_id: i for i, parent_id in enumerate(self.config.get("priority_ids", []))}
+        parent_key = self.primary_keys[0]
+        priority_key = cast("str", self.priority_key)
+        ordered = sorted(records, key=lambda r: r.get(priority_key) or "", reverse=True)
+        ordered.sort(key=lambda r: rank.get(r.get(parent_key), len(rank)))
+        return ordered
+
+    @property
+    def schedules_by_cost(self) -> bool:
+        """Whether parents are ordered by the learned cost of their children.
+
+        Costs are not learned from sampled runs, whose children are only partly synced.
+        """
+        return (
+            bool(self.config.get("schedule_by_cost"))
+            and bool(self.child_streams)
+            and not self.sample
+        )
+
+    @property
+    def parent_costs(self) -> dict[str, dict[str, float]]:
+        """Return the seconds and records spent on the children of each parent.
+
+        Costs are learned by previous runs, and keyed by parent ID.
+        """
+        return self.stream_state.get(PARENT_COSTS_STATE_KEY) or {}
+
+    def schedule(self, records: Iterable[dict[str, Any]]) -> Iterable[dict[str, Any]]:
+        """Order parent records by the learned cost of their children, longest first.
+
+        Parents without a known cost follow in listing order, and records are yielded
+        as listed when no previous run learned any cost.
+        """
+        if not (costs := self.parent_costs):
+            return records
+
+        parent_key = self.primary_keys[0]
+
+        def seconds(record: dict[str, Any]) -> float:
+            if (parent_id := record.get(parent_key)) is None:
+                return 0
+            return costs.get(parent_id, {}).get("seconds", 0)
+
+        return sorted(records, key=lambda r: -seconds(r))
+
+    @property
+    def descendant_records(self) -> int:
+        """Return the number of records read by the child streams, recursively."""
+        return sum(
+            child._records_read + child.descendant_records  # noqa: SLF001
+            for child in self.child_streams
+            if isinstance(child, SigmaStream)
+        )
+
+    @override
+    def _sync_children(self, child_context: Context | None) -> None:
+        """Sync the children of a parent, learning their cost under `schedule_by_cost`.
+
+        Once the `max_runtime` budget is spent, the children are deferred to the next run.
+        """
+        if child_context is not None and self.tap.out_of_time:
+            self.defer_children(child_context)
+            return
+
+        costs = self._new_parent_costs
+        if costs is None or child_context is None or self._current_parent is None:
+            super()._sync_children(child_context)
+            return
+
+        start = time.perf_counter()
+        records = self.descendant_records
+        super()._sync_children(child_context)
+        cost = costs.setdefault(self._current_parent, {"seconds": 0, "records": 0})
+        cost["seconds"] = round(cost["seconds"] + time.perf_counter() - start, 3)
+        cost["records"] += self.descendant_records - records
+
+    def _save_parent_costs(self) -> None:
+        """Store the learned parent costs in the stream state.
+
+        Only the costs of the parents measured by this run are replaced. The costs of
+        parents which are no longer listed are dropped, unless only `selected_ids` were.
+        """
+        costs = cast("dict[str, dict[str, float]]", self._new_parent_costs)
+        self._new_parent_costs = None
+        previous = self.parent_costs
+        if not self.selected_ids:
+            listed = self._listed_parents
+            previous = {key: cost for key, cost in previous.items() if key in listed}
+        self.stream_state[PARENT_COSTS_STATE_KEY] = {**previous, **costs}
+
+    def keep_context(self, context: Context | None) -> None:
+        """Keep the indexed records of a context which was not synced."""
+        if (record_index := self.tap.record_index) is not None:
+            # Records of a skipped context are unknown, not deleted
+            record_index.keep_context(self.name, context)
+
+    @override
+    def get_records(self, context: Context | None) -> Iterable[dict[str, Any]]:
+        """Return records, fetching only the configured IDs when set.
+
+        The first and last streams synced by `sync_all` start and finish the sync of the
+        tap, so the tap never needs to override `sync_all`. A sampled run is always
+        incomplete, since `max_pages` may cut any listing short.
+        """
+        top_level_streams = self.tap.top_level_streams
+        if context is None and top_level_streams and top_level_streams[0] is self:
+            self.tap.start_sync()
+        if self.sample:
+            self.tap.sync_incomplete = True
+        # A stream which activated a new version is synced in full, lest the target
+        # drop its records
+        if context is None and self.tap.out_of_time and self._stream_version is None:
+            self.defer()
+        else:
+            self.stream_state.pop(DEFERRED_STATE_KEY, None)
+            yield from self._get_scheduled_records(context)
+        if context is None and top_level_streams and top_level_streams[-1] is self:
+            self.tap.finish_sync()
+
+    def _get_scheduled_records(self, context: Context | None) -> Iterable[dict[str, Any]]:
+        """Return records in the order their children should be synced.
+
+        Under `max_runtime`, parent records are yielded in priority order and the
+        completed parents are forgotten once every child context has been synced.
+        Otherwise, under `schedule_by_cost`, parents with the slowest children are
+        yielded first. When progress is reported, the parent list is read before any
+        child context is synced, to count the contexts of the child streams.
+        """
+        self._skipped_parents = 0
+        self._sampled_parents = {}
+        if self.schedules_by_cost:
+            self._new_parent_costs = {}
+            self._listed_parents = set()
+
+        records: Iterable[dict[str, Any]]
+        if self.is_time_budgeted:
+            records = self.prioritize(self._get_records(context))
+        elif self.schedules_by_cost:
+            records = self.schedule(self._get_records(context))
+        else:
+            records = self._get_records(context)
+
+        if child_progress := self.child_progress:
+            records = list(records)
+            for progress in child_progress:
+                progress.add_contexts(len(records))
+        yield from records
+
+        if self.schedules_by_cost:
+            self._save_parent_costs()
+        if not self._skipped_parents:
+            if self.is_time_budgeted:
+                self.stream_state.pop(PROGRESS_STATE_KEY, None)
+            return
+
+        self.log(
+            "Children of %d %s were deferred and will be synced by the next run",
+            self._skipped_parents,
+            self.name,
+            level=logging.WARNING,
+        )
+        if context is None:
+            self.stream_state[DEFERRED_STATE_KEY] = True
+
+    def defer(self) -> None:
+        """Leave this stream to the next run, which syncs it first."""
+        self.tap.sync_incomplete = True
+        self.keep_context(None)
+        self.stream_state[DEFERRED_STATE_KEY] = True
+        self.log(
+            "Ran out of time, %s will be synced first by the next run",
+            self.name,
+            level=logging.WARNING,
+        )
+
+    def defer_children(self, child_context: Context) -> None:
+        """Leave the children of a parent to the next run."""
+        self.tap.deferred_contexts += 1
+        self.tap.sync_incomplete = True
+        for child in self.child_streams:
+            if isinstance(child, SigmaStream):
+                child.keep_context(child_context)
+
+    @property
+    def child_progress(self) -> list[StreamProgress]:
+        """Return the live progress of the child streams, if progress reporting is enabled."""
+        return [
+            progress
+            for child in self.child_streams
+            if isinstance(child, SigmaStream) and (progress := child.progress) is not None
+        ]
+
+    @override
+    def _process_record(
+        self,
+        record: Record,
+        child_context: Context | None = None,
+        partition_context: Context | None = None,
+    ) -> None:
+        """Process a record, counting the child contexts it completes.
+
+        Contexts skipped by sampling, `max_runtime` or an open circuit breaker count as
+        completed, since this run is done with them.
+        """
+        super()._process_record(record, child_context, partition_context)
+        for progress in self.child_progress:
+            progress.complete_context()
+
+    def is_sampled(self, record: Record) -> bool:
+        """Return whether the children of a parent are synced in sampling mode.
+
+        Parents are kept if the hash of their ID falls within `percent`, and only the
+        first `per_workspace` of each group are kept: workbooks and data models are
+        grouped by workspace, workbook pages by workbook.
+        """
+        sample = self.sample
+        parent_id = str(record.get(self.primary_keys[0]))
+        if (percent := sample.get("percent")) is not None:
+            seeded_id = f"{sample.get('seed', '')}{parent_id}".encode()
+            bucket = int.from_bytes(hashlib.sha256(seeded_id).digest()[:8], "big") % 10_000
+            if bucket >= percent * 100:
+                return False
+
+        if (per_workspace := sample.get("per_workspace")) is not None:
+            group = ""
+            if self.sample_group_key is not None:
+                group = str(record.get(self.sample_group_key) or "").split("/")[0]
+            sampled = self._sampled_parents.get(group, 0)
+            if sampled >= per_workspace:
+                return False
+            self._sampled_parents[group] = sampled + 1
+        return True
+
+    @override
+    def generate_child_contexts(
+        self,
+        record: Record,
+        context: Context | None,
+    ) -> Iterable[Context | None]:
+        """Generate child contexts, skipping completed parents under `max_runtime`.
+
+        Parents with deferred child contexts are counted, and left uncompleted so the
+        next run syncs their children again. In sampling mode, only the children of
+        sampled parents are synced.
+        """
+        self._current_parent = record.get(self.primary_keys[0])
+        if self._new_parent_costs is not None and self._current_parent is not None:
+            self._listed_parents.add(self._current_parent)
+        if self.sample and not self.is_sampled(record):
+            self.tap.sync_incomplete = True
+            return
+
+        if self.is_time_budgeted:
+            parent_id = record[self.primary_keys[0]]
+            version = record.get(cast("str", self.priority_key))
+            completed = self.completed_parents
+            if parent_id in completed and completed[parent_id] == version:
+                self.tap.sync_incomplete = True
+                return
+
+        deferred = self.tap.deferred_contexts
+        yield from super().generate_child_contexts(record, context)
+        if self.tap.deferred_contexts != deferred:
+            self._skipped_parents += 1
+        elif self.is_time_budgeted:
+            completed[parent_id] = version
+
 
 class SigmaChildStream(SigmaStream):
     """Base class for child streams with graceful 4xx error handling.
 
     If the API returns a 4xx response for a given parent context, the error is
     logged as a warning and the sync moves on to the next context instead of
-    aborting the entire run.
+    aborting the entire run. Contexts are also deferred to the next run while the
+    circuit breaker of the endpoint is open.
     """
 
     @override
@@ -149,3 +1263,23 @@ class SigmaChildStream(SigmaStream):
                 context,
                 exc_info=True,
             )
+            self.keep_context(context)
+        except CircuitOpenError:
+            self._deferred_contexts += 1
+            self.tap.deferred_contexts += 1
+            self.tap.sync_incomplete = True
+            self.keep_context(context)
+
+    def log_circuit_breaker(self) -> None:
+        """Report the contexts deferred while the circuit breaker of the endpoint was open."""
+        if not self._deferred_contexts:
+            return
+        breaker = cast("CircuitBreaker", self.circuit_breaker)
+        self.log(
+            "Circuit breaker of %s opened %d time(s), %d %s context(s) deferred to the next run",
+            self.path,
+            breaker.trips,
+            self._deferred_contexts,
+            self.name,
+            level=logging.WARNING,
+        )
@@ -0,0 +1,136 @@
+"""Hedged requests to cut the tail latency of slow endpoints."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import requests
+
+
+DEFAULT_HEDGE_BUDGET = 0.05
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+def _close_response(future: Future[tuple[requests.Response, float]]) -> None:
+    """Release the connection and spooled body of a response that lost the race."""
+    if future.exception() is None:
+        response, _ = future.result()
+        response.close()
+
+
+def _timed(send: Callable[[], requests.Response]) -> tuple[requests.Response, float]:
+    """Send a request, returning its response and the seconds until its body was read."""
+    start = time.perf_counter()
+    response = send()
+    return response, time.perf_counter() - start
+
+
+def _is_ok(future: Future[tuple[requests.Response, float]]) -> bool:
+    return future.exception() is None and future.result()[0].ok
+
+
+class LatencyTracker:
+    """Rolling window of request latencies."""
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        """Initialize the tracker.
+
+        Args:
+            window: Number of most recent latencies to keep.
+        """
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        """Record the latency of a request."""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """Return the `q` percentile of the recorded latencies, if there are enough."""
+        with self._lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(math.ceil(q * len(ordered)) - 1, len(ordered) - 1)]
+
+
+class RequestHedger:
+    """Send a duplicate of a request that is slower than the observed p95.
+
+    The first successful response is used, and an error only once every attempt failed.
+    Duplicates are limited to a fraction of all requests, so hedging never adds more
+    than `budget` extra load.
+    """
+
+    def __init__(self, budget: float = DEFAULT_HEDGE_BUDGET, concurrency: int = 1) -> None:
+        """Initialize the hedger.
+
+        Args:
+            budget: Maximum ratio of hedged requests to all requests.
+            concurrency: Maximum number of requests sent at once through the hedger.
+        """
+        self.budget = budget
+        self.latencies = LatencyTracker()
+        self.requests = 0
+        self.hedged = 0
+        # Room for a duplicate of every request in flight
+        self._executor = ThreadPoolExecutor(
+            max_workers=2 * concurrency,
+            thread_name_prefix="sigma-hedge",
+        )
+        self._lock = threading.Lock()
+
+    def _can_hedge(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.budget * self.requests:
+                return False
+            self.hedged += 1
+            return True
+
+    def send(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """Send a request, hedging it if it takes longer than the p95 latency.
+
+        Latencies are measured until the body of the response was read, since `send`
+        returns once the body is downloaded or spooled.
+        """
+        with self._lock:
+            self.requests += 1
+
+        threshold = self.latencies.percentile(0.95)
+        primary = self._executor.submit(_timed, send)
+        pending: set[Future[tuple[requests.Response, float]]] = {primary}
+        done, _ = wait(pending, timeout=threshold)
+        if not done and self._can_hedge():
+            pending.add(self._executor.submit(_timed, send))
+
+        completed: list[Future[tuple[requests.Response, float]]] = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            completed.extend(done)
+            if any(_is_ok(future) for future in done):
+                break
+
+        # An error is only raised if no attempt returned a response
+        ok = [future for future in completed if _is_ok(future)]
+        responses = [future for future in completed if future.exception() is None]
+        winner = (ok or responses or completed)[0]
+        for future in {*completed, *pending} - {winner}:
+            # Late duplicates are closed as soon as they complete
+            future.add_done_callback(_close_response)
+        response, seconds = winner.result()
+        self.latencies.add(seconds)
+        return response
+
+    def close(self) -> None:
+        """Wait for the duplicates still in flight, then stop the hedging threads."""
+        self._executor.shutdown(wait=True)
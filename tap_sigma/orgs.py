@@ -0,0 +1,101 @@
+"""Sync of several Sigma organizations in a single tap process."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import copy
+import sys
+import threading
+from typing import TYPE_CHECKING, Any
+
+from singer_sdk.io_base import SingerWriter
+from singer_sdk.singerlib import StateMessage
+
+if sys.version_info >= (3, 12):
+    from typing import override
+else:
+    from typing_extensions import override
+
+if TYPE_CHECKING:
+    from tap_sigma.state_store import StateStore
+
+
+ORG_STATES_KEY = "orgs"
+
+#: Key of the pointer to the external state store in STATE messages
+STATE_STORE_KEY = "state_store"
+
+
+class MultiOrgWriter(SingerWriter):
+    """Serialize the messages of every org tap to a single output.
+
+    STATE messages of the org taps are merged into the state of the main tap under
+    `orgs.<name>`, so each emitted STATE holds the bookmarks of every org. With a
+    `state_store`, the merged state is saved to it and STATE messages only hold a
+    pointer to the saved state.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the writer."""
+        super().__init__()
+        self._lock = threading.Lock()
+        self._state: dict[str, Any] = {}
+        self._org_states: dict[str, dict[str, Any]] = {}
+        self.state_store: StateStore | None = None
+
+    def load_org_states(self, org_states: dict[str, dict[str, Any]]) -> None:
+        """Keep the input state of every org until the org tap emits a new one."""
+        with self._lock:
+            self._org_states.update(copy.deepcopy(org_states))
+
+    def for_org(self, name: str) -> OrgWriter:
+        """Return the writer of an org tap."""
+        return OrgWriter(self, name)
+
+    def _write_state(self) -> None:
+        state = dict(self._state)
+        if self._org_states:
+            state[ORG_STATES_KEY] = self._org_states
+        if self.state_store is not None:
+            state = {STATE_STORE_KEY: self.state_store.save(state)}
+        super().write_message(StateMessage(value=state))
+
+    def write_org_message(self, name: str | None, message: Any) -> None:  # noqa: ANN401
+        """Write a message of the main tap (`name=None`) or of an org tap."""
+        if isinstance(message, StateMessage):
+            # Copied in the thread of the tap that owns the state
+            value = copy.deepcopy(dict(message.value))
+            with self._lock:
+                if name is None:
+                    self._state = value
+                else:
+                    self._org_states[name] = value
+                self._write_state()
+            return
+
+        with self._lock:
+            super().write_message(message)
+
+    @override
+    def write_message(self, message: Any) -> None:
+        """Write a message of the main tap."""
+        self.write_org_message(None, message)
+
+
+class OrgWriter(SingerWriter):
+    """Forward the messages of an org tap to the writer of the main tap."""
+
+    def __init__(self, writer: MultiOrgWriter, name: str) -> None:
+        """Initialize the writer.
+
+        Args:
+            writer: The writer of the main tap.
+            name: Name of the org.
+        """
+        super().__init__()
+        self.writer = writer
+        self.name = name
+
+    @override
+    def write_message(self, message: Any) -> None:
+        """Write a message of the org tap."""
+        self.writer.write_org_message(self.name, message)
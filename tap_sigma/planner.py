@@ -0,0 +1,271 @@
+"""Dry-run estimation of the API cost of a sync."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from tap_sigma.client import SigmaPaginator, SigmaStream, get_response_value
+
+if TYPE_CHECKING:
+    from singer_sdk import Stream
+    from singer_sdk.helpers.types import Context
+
+    from tap_sigma.tap import TapSigma
+
+
+DEFAULT_SAMPLE_SIZE = 5
+
+
+@dataclass
+class StreamPlan:
+    """Estimated API cost of syncing a single stream."""
+
+    stream: str
+    parent: str | None
+    page_size: int
+    contexts: int
+    sampled_contexts: int
+    sampled_requests: int
+    sampled_records: int
+    sampled_seconds: float
+    org: str | None = None
+    concurrency: int = 1
+    total_records: int | None = None
+
+    @property
+    def pages_per_context(self) -> float:
+        """Average number of pages requested per context.
+
+        When only the first page of a listing was requested, pages are counted from the
+        `total` it reports instead.
+        """
+        if self.total_records is not None:
+            return max(math.ceil(self.total_records / self.page_size), 1)
+        if not self.sampled_contexts:
+            return 1.0
+        return max(self.sampled_requests / self.sampled_contexts, 1.0)
+
+    @property
+    def expected_requests(self) -> int:
+        """Expected number of requests for all contexts of the stream."""
+        return math.ceil(self.contexts * self.pages_per_context)
+
+    @property
+    def expected_records(self) -> int:
+        """Expected number of records for all contexts of the stream."""
+        if self.total_records is not None:
+            return self.total_records
+        if not self.sampled_contexts:
+            return 0
+        return math.ceil(self.contexts * self.sampled_records / self.sampled_contexts)
+
+    @property
+    def latency(self) -> float:
+        """Mean measured request latency in seconds."""
+        if not self.sampled_requests:
+            return 0.0
+        return self.sampled_seconds / self.sampled_requests
+
+    def eta_seconds(self, requests_per_second: float | None = None) -> float:
+        """Expected duration of the stream, with `concurrency` requests at a time."""
+        min_interval = 1 / requests_per_second if requests_per_second else 0.0
+        return self.expected_requests * max(self.latency / self.concurrency, min_interval)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable report of the stream plan."""
+        return {
+            **asdict(self),
+            "pages_per_context": round(self.pages_per_context, 2),
+            "expected_requests": self.expected_requests,
+            "expected_records": self.expected_records,
+            "latency_seconds": round(self.latency, 3),
+        }
+
+
+@dataclass
+class SyncPlan:
+    """Estimated API cost of a full sync."""
+
+    streams: list[StreamPlan] = field(default_factory=list)
+    requests_per_second: float | None = None
+
+    @property
+    def expected_requests(self) -> int:
+        """Expected number of requests across all streams."""
+        return sum(plan.expected_requests for plan in self.streams)
+
+    @property
+    def eta_seconds(self) -> float:
+        """Expected duration of the sync, bounded by the rate limit of each org.
+
+        Streams of an org are synced one after the other, while orgs are synced
+        concurrently, so the slowest org sets the duration.
+        """
+        durations: dict[str | None, float] = {}
+        for plan in self.streams:
+            eta = plan.eta_seconds(self.requests_per_second)
+            durations[plan.org] = durations.get(plan.org, 0.0) + eta
+        return max(durations.values(), default=0.0)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable report of the sync plan."""
+        return {
+            "streams": [plan.to_dict() for plan in self.streams],
+            "expected_requests": self.expected_requests,
+            "requests_per_second": self.requests_per_second,
+            "eta_seconds": round(self.eta_seconds, 1),
+        }
+
+
+def _wants_sync(stream: Stream) -> bool:
+    return stream.selected or stream.has_selected_descendents
+
+
+def _sample(contexts: list[Context], size: int) -> list[Context]:
+    """Pick up to `size` contexts spread evenly across the list."""
+    if len(contexts) <= size:
+        return contexts
+    step = len(contexts) / size
+    return [contexts[int(i * step)] for i in range(size)]
+
+
+class SyncPlanner:
+    """Estimate requests, pages and duration of a sync without running it.
+
+    Parent streams are listed in full and fanned out with the same rules as a regular
+    sync (`post_process` and `get_child_context`), without the bookkeeping of a sync.
+    Child leaf streams only request a small sample of their contexts to measure pages
+    per context and latency, and top-level leaf streams only their first page. Every
+    org in `orgs` is planned as well.
+    """
+
+    def __init__(self, tap: TapSigma, *, sample_size: int = DEFAULT_SAMPLE_SIZE) -> None:
+        """Initialize the planner.
+
+        Args:
+            tap: The tap whose selected streams are planned.
+            sample_size: Number of contexts requested per leaf stream.
+        """
+        self.tap = tap
+        self.sample_size = sample_size
+
+    def plan(self) -> SyncPlan:
+        """Plan every selected stream of every org of the tap."""
+        sync_plan = SyncPlan(requests_per_second=self.tap.config.get("max_requests_per_second"))
+        org_taps = [self.tap.create_org_tap(org) for org in self.tap.config.get("orgs") or []]
+        for tap in (self.tap, *org_taps):
+            for stream in tap.streams.values():
+                if stream.parent_stream_type or not _wants_sync(stream):
+                    continue
+                if not isinstance(stream, SigmaStream):
+                    continue
+                if any(_wants_sync(child) for child in stream.child_streams):
+                    self._plan_stream(stream, [{}], sync_plan)
+                else:
+                    self._plan_first_page(stream, sync_plan)
+        return sync_plan
+
+    def _plan_first_page(self, stream: SigmaStream, sync_plan: SyncPlan) -> None:
+        """Plan a top-level leaf stream from the first page of its listing.
+
+        The pages are counted from the `total` of the first page, or from the page
+        alone when it is the last one. Otherwise, the listing counts as a single page.
+        """
+        response = stream.request_first_page(None)
+        records = len(list(stream.parse_response(response)))
+        total = get_response_value(response, "total")
+        if total is None and get_response_value(response, "nextPage") is None:
+            total = records
+
+        costs = stream.sync_costs
+        self._add_plan(
+            sync_plan,
+            StreamPlan(
+                stream=stream.name,
+                parent=None,
+                page_size=stream.page_size,
+                contexts=1,
+                sampled_contexts=1,
+                sampled_requests=costs.get("requests", 0),
+                sampled_records=records,
+                sampled_seconds=costs.get("request_ms", 0) / 1000,
+                org=stream.org_name,
+                concurrency=self._concurrency(stream),
+                total_records=None if total is None else int(total),
+            ),
+            stream,
+        )
+
+    def _plan_stream(
+        self,
+        stream: SigmaStream,
+        contexts: list[Context],
+        sync_plan: SyncPlan,
+        parent: str | None = None,
+    ) -> None:
+        children = [
+            child
+            for child in stream.child_streams
+            if isinstance(child, SigmaStream) and _wants_sync(child)
+        ]
+        sampled = contexts if children else _sample(contexts, self.sample_size)
+        costs_before = stream.sync_costs
+
+        records = 0
+        child_contexts: list[Context] = []
+        for context in sampled:
+            for record in stream.request_records(context or None):
+                processed = stream.post_process(record, context or None)
+                if processed is None:
+                    continue
+                records += 1
+                if not children:
+                    continue
+                for key, value in context.items():
+                    processed.setdefault(key, value)
+                child_context = stream.get_child_context(processed, context or None)
+                if child_context is not None:
+                    child_contexts.append(child_context)
+
+        costs = stream.sync_costs
+        requests = costs.get("requests", 0) - costs_before.get("requests", 0)
+        request_ms = costs.get("request_ms", 0) - costs_before.get("request_ms", 0)
+        self._add_plan(
+            sync_plan,
+            StreamPlan(
+                stream=stream.name,
+                parent=parent,
+                page_size=stream.page_size,
+                contexts=len(contexts),
+                sampled_contexts=len(sampled),
+                sampled_requests=requests,
+                sampled_records=records,
+                sampled_seconds=request_ms / 1000,
+                org=stream.org_name,
+                concurrency=self._concurrency(stream),
+            ),
+            stream,
+        )
+
+        for child in children:
+            self._plan_stream(child, child_contexts, sync_plan, parent=stream.name)
+
+    @staticmethod
+    def _concurrency(stream: SigmaStream) -> int:
+        """Return how many requests of a context are sent at once."""
+        if isinstance(stream.get_new_paginator(), SigmaPaginator):
+            return max(stream.parallel_pages, 1)
+        return 1
+
+    @staticmethod
+    def _add_plan(sync_plan: SyncPlan, plan: StreamPlan, stream: SigmaStream) -> None:
+        sync_plan.streams.append(plan)
+        stream.log(
+            "Planned %s: %d contexts, ~%d requests, ~%d records",
+            stream.name,
+            plan.contexts,
+            plan.expected_requests,
+            plan.expected_records,
+        )
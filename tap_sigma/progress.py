@@ -0,0 +1,219 @@
+"""Live progress of each stream, logged periodically and served on a local endpoint."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import logging
+
+DEFAULT_PROGRESS_HOST = "127.0.0.1"
+
+
+class StreamProgress:
+    """Contexts, records and requests of a stream since its first context started.
+
+    `contexts_total` is the number of parent records listed so far, so it is only final
+    once every parent list has been read.
+    """
+
+    def __init__(self, org: str, stream: str) -> None:
+        """Initialize the progress.
+
+        Args:
+            org: Name of the org the stream belongs to.
+            stream: Name of the stream.
+        """
+        self.org = org
+        self.stream = stream
+        self.started_at: float | None = None
+        self.contexts_completed = 0
+        self.contexts_total: int | None = None
+        self.records = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the clock of the rates and ETA, unless already started."""
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+    def add_contexts(self, count: int) -> None:
+        """Count the contexts of newly listed parents."""
+        with self._lock:
+            self.start()
+            self.contexts_total = (self.contexts_total or 0) + count
+
+    def complete_context(self) -> None:
+        """Count a context whose records were synced, or skipped by this run."""
+        with self._lock:
+            self.contexts_completed += 1
+
+    def add_request(self) -> None:
+        """Count a request, which may be sent by a page fetching thread."""
+        with self._lock:
+            self.start()
+            self.requests += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the progress, with the rates and ETA at this time."""
+        elapsed = time.monotonic() - self.started_at if self.started_at is not None else 0.0
+        completed = self.contexts_completed
+        total = self.contexts_total
+        eta = None
+        if total is not None and completed and elapsed:
+            eta = round(elapsed / completed * max(total - completed, 0), 1)
+        return {
+            "org": self.org,
+            "stream": self.stream,
+            "contexts_completed": completed,
+            "contexts_total": total,
+            "records": self.records,
+            "requests": self.requests,
+            "elapsed_seconds": round(elapsed, 1),
+            "records_per_second": round(self.records / elapsed, 1) if elapsed else 0.0,
+            "requests_per_second": round(self.requests / elapsed, 2) if elapsed else 0.0,
+            "eta_seconds": eta,
+        }
+
+
+class ProgressReporter:
+    """Progress of every stream of every org, logged every `interval` seconds.
+
+    When `port` is set, the progress is also served as JSON on `/status` of a local
+    HTTP endpoint.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        interval: float | None = None,
+        port: int | None = None,
+        host: str = DEFAULT_PROGRESS_HOST,
+    ) -> None:
+        """Initialize the reporter.
+
+        Args:
+            logger: Logger of the progress lines.
+            interval: Number of seconds between progress lines, or None not to log them.
+            port: Port of the status endpoint, or None not to serve it.
+            host: Interface the status endpoint listens on.
+        """
+        self.logger = logger
+        self.interval = interval
+        self.port = port
+        self.host = host
+        self._streams: dict[tuple[str, str], StreamProgress] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._server: ThreadingHTTPServer | None = None
+
+    def track(self, org: str, stream: str) -> StreamProgress:
+        """Return the progress of a stream of an org."""
+        with self._lock:
+            if (org, stream) not in self._streams:
+                self._streams[org, stream] = StreamProgress(org, stream)
+            return self._streams[org, stream]
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Return the progress of the streams which started syncing."""
+        with self._lock:
+            streams = list(self._streams.values())
+        return [progress.snapshot() for progress in streams if progress.started_at is not None]
+
+    def log(self) -> None:
+        """Log a structured progress line per stream."""
+        for point in self.snapshot():
+            self.logger.info("PROGRESS: %s", json.dumps(point, separators=(",", ":")))
+
+    @property
+    def server_address(self) -> tuple[str, int] | None:
+        """Return the address the status endpoint listens on, once started."""
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        return str(host), int(port)
+
+    def start(self) -> None:
+        """Start logging the progress and serving the status endpoint."""
+        if self.port is not None and self._server is None:
+            self._server = server = ThreadingHTTPServer(
+                (self.host, self.port),
+                _status_handler(self),
+            )
+            server.daemon_threads = True
+            threading.Thread(
+                target=server.serve_forever,
+                name="sigma-progress-server",
+                daemon=True,
+            ).start()
+            host, port = server.server_address[:2]
+            self.logger.info("Serving sync progress on http://%s:%d/status", host, port)
+
+        if self.interval and self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._report,
+                name="sigma-progress",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _report(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.log()
+
+    def stop(self) -> None:
+        """Log the final progress and stop the reporting threads."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self.log()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _status_handler(reporter: ProgressReporter) -> type[BaseHTTPRequestHandler]:
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") not in {"", "/status"}:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+
+            body = json.dumps({"streams": reporter.snapshot()}).encode()
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002, ARG002
+            # Polling the endpoint should not flood the tap logs
+            return
+
+    return StatusHandler
+
+
+_REPORTERS: dict[tuple[float | None, int | None], ProgressReporter] = {}
+_REPORTERS_LOCK = threading.Lock()
+
+
+def get_progress_reporter(
+    logger: logging.Logger,
+    interval: float | None,
+    port: int | None,
+) -> ProgressReporter:
+    """Return the reporter shared by every org of the process."""
+    with _REPORTERS_LOCK:
+        if (interval, port) not in _REPORTERS:
+            _REPORTERS[interval, port] = ProgressReporter(logger, interval, port)
+        return _REPORTERS[interval, port]
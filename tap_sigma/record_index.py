@@ -0,0 +1,126 @@
+"""Local index of record hashes used to skip unchanged records and detect deletes."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    from singer_sdk.helpers.types import Context, Record
+
+
+DELETED_KEYS_BATCH_SIZE = 10_000
+
+
+def record_key(record: Record, primary_keys: Sequence[str]) -> str:
+    """Return a stable string key for the primary key values of a record."""
+    return json.dumps([record.get(key) for key in primary_keys], default=str)
+
+
+def record_hash(record: Record) -> bytes:
+    """Return a compact content hash of a record."""
+    payload = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).digest()
+
+
+def context_key(context: Context | None) -> str:
+    """Return a stable string key for a stream context."""
+    return json.dumps(dict(context or {}), sort_keys=True, default=str)
+
+
+class RecordIndex:
+    """SQLite-backed mapping of stream primary keys to record hashes.
+
+    Every record seen is stamped with the current run number, so keys left with an
+    older run number after a complete sync no longer exist in Sigma. Changes are only
+    committed once the sync completes, so records emitted by a failed run are emitted
+    again by the next one.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open or create the index.
+
+        Args:
+            path: Path of the SQLite database file.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS record_hashes ("
+            "stream TEXT NOT NULL, "
+            "key TEXT NOT NULL, "
+            "hash BLOB NOT NULL, "
+            "context TEXT NOT NULL, "
+            "run INTEGER NOT NULL, "
+            "PRIMARY KEY (stream, key)"
+            ") WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS record_hashes_run ON record_hashes (stream, run);"
+            "CREATE TABLE IF NOT EXISTS runs (run INTEGER PRIMARY KEY AUTOINCREMENT);",
+        )
+        cursor = self._connection.execute("INSERT INTO runs DEFAULT VALUES")
+        self.run = cursor.lastrowid
+
+    def has_changed(
+        self,
+        stream: str,
+        key: str,
+        digest: bytes,
+        context: Context | None = None,
+    ) -> bool:
+        """Record the hash of a record and return whether it is new or changed."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT hash FROM record_hashes WHERE stream = ? AND key = ?",
+                (stream, key),
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO record_hashes (stream, key, hash, context, run) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (stream, key, digest, context_key(context), self.run),
+            )
+            return row is None or row[0] != digest
+
+    def keep_context(self, stream: str, context: Context | None) -> None:
+        """Mark every known key of a context as seen, e.g. when the context was skipped."""
+        with self._lock:
+            self._connection.execute(
+                "UPDATE record_hashes SET run = ? WHERE stream = ? AND context = ?",
+                (self.run, stream, context_key(context)),
+            )
+
+    def pop_deleted(self, stream: str) -> Iterator[list[str]]:
+        """Remove and yield, in chunks, the keys of a stream not seen during this run."""
+        while True:
+            with self._lock:
+                keys = [
+                    key
+                    for (key,) in self._connection.execute(
+                        "SELECT key FROM record_hashes WHERE stream = ? AND run < ? LIMIT ?",
+                        (stream, self.run, DELETED_KEYS_BATCH_SIZE),
+                    )
+                ]
+                self._connection.executemany(
+                    "DELETE FROM record_hashes WHERE stream = ? AND key = ?",
+                    [(stream, key) for key in keys],
+                )
+            if not keys:
+                return
+            yield keys
+
+    def commit(self) -> None:
+        """Persist the hashes recorded during this run."""
+        with self._lock:
+            self._connection.commit()
+
+    def close(self) -> None:
+        """Close the index, discarding uncommitted changes."""
+        with self._lock:
+            self._connection.close()
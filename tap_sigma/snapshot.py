@@ -0,0 +1,54 @@
+"""On-disk snapshots of parent records shared by separate tap invocations."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+DEFAULT_SNAPSHOT_TTL = 3600
+
+
+class ParentSnapshot:
+    """A JSON file holding the parent records needed to build child contexts.
+
+    Files are replaced atomically, so concurrent jobs either read the previous
+    snapshot or the new one, never a partial file.
+    """
+
+    def __init__(self, path: str | Path, ttl: float = DEFAULT_SNAPSHOT_TTL) -> None:
+        """Initialize the snapshot.
+
+        Args:
+            path: Path of the snapshot file.
+            ttl: Number of seconds a snapshot can be reused for.
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+
+    def read(self) -> list[dict[str, Any]] | None:
+        """Return the snapshot records, or None if there is no fresh snapshot."""
+        try:
+            with self.path.open(encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - snapshot.get("created_at", 0) > self.ttl:
+            return None
+        return snapshot.get("records")
+
+    def write(self, records: list[dict[str, Any]]) -> None:
+        """Atomically replace the snapshot with new records."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=self.path.parent,
+            prefix=f".{self.path.name}.",
+            delete=False,
+        ) as file:
+            json.dump({"created_at": time.time(), "records": records}, file)
+        Path(file.name).replace(self.path)
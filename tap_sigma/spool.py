@@ -0,0 +1,315 @@
+"""Spooling of large response bodies to disk, with incremental JSON parsing."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+import tempfile
+import threading
+import weakref
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    import requests
+
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+#: Run of JSON text without square brackets outside strings
+_NON_BRACKETS = re.compile(r'[^"\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]]*)*')
+_DECODER = json.JSONDecoder()
+
+
+def _match_end(pattern: re.Pattern[str], text: str, pos: int) -> int:
+    """Return where a run of `pattern` starting at `pos` ends, `pos` if it is empty."""
+    match = pattern.match(text, pos)
+    return pos if match is None else match.end()
+
+
+_LARGE_RESPONSE_SLOTS: dict[int, threading.BoundedSemaphore] = {}
+_LARGE_RESPONSE_SLOTS_LOCK = threading.Lock()
+
+
+def get_large_response_slots(limit: int) -> threading.BoundedSemaphore:
+    """Return the semaphore shared by every stream downloading large responses."""
+    with _LARGE_RESPONSE_SLOTS_LOCK:
+        if limit not in _LARGE_RESPONSE_SLOTS:
+            _LARGE_RESPONSE_SLOTS[limit] = threading.BoundedSemaphore(limit)
+        return _LARGE_RESPONSE_SLOTS[limit]
+
+
+class MemoryBudget:
+    """Bytes of response bodies held in memory at the same time, across every stream."""
+
+    def __init__(self, limit: int) -> None:
+        """Initialize the budget.
+
+        Args:
+            limit: Maximum number of bytes held in memory.
+        """
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size: int) -> bool:
+        """Reserve `size` bytes, and return whether they fit in the budget."""
+        with self._lock:
+            if self.used + size > self.limit:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size: int) -> None:
+        """Return `size` reserved bytes to the budget."""
+        with self._lock:
+            self.used -= size
+
+
+_MEMORY_BUDGETS: dict[int, MemoryBudget] = {}
+_MEMORY_BUDGETS_LOCK = threading.Lock()
+
+
+def get_memory_budget(limit: int) -> MemoryBudget:
+    """Return the memory budget shared by every stream and org of the process."""
+    with _MEMORY_BUDGETS_LOCK:
+        if limit not in _MEMORY_BUDGETS:
+            _MEMORY_BUDGETS[limit] = MemoryBudget(limit)
+        return _MEMORY_BUDGETS[limit]
+
+
+class SpooledBody:
+    """A response body spooled to a temporary file.
+
+    Readers keep their own offset, so the records of a page can be parsed while the
+    paginator looks up the next page token in another thread.
+    """
+
+    def __init__(self, file: tempfile.SpooledTemporaryFile[bytes], wire_size: int = 0) -> None:
+        """Initialize the body.
+
+        Args:
+            file: The temporary file holding the body.
+            wire_size: Number of bytes received, before content decoding.
+        """
+        self.file = file
+        self.wire_size = wire_size
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._members: dict[str, Any] | None = None
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """Read up to `size` bytes starting at `offset`."""
+        with self._lock:
+            self.file.seek(offset)
+            return self.file.read(size)
+
+    def read(self, size: int = -1) -> bytes:
+        """Read the body sequentially, e.g. when `response.content` is accessed."""
+        if size < 0:
+            size = self.size - self._offset
+        chunk = self.read_at(self._offset, size)
+        self._offset += len(chunk)
+        return chunk
+
+    @property
+    def size(self) -> int:
+        """Size of the body in bytes."""
+        with self._lock:
+            return self.file.seek(0, 2)
+
+    def iter_items(self, key: str) -> Iterator[Any]:
+        """Decode the items of the top-level array `key` one at a time.
+
+        The other top-level members are kept, so looking them up once the items are
+        decoded does not scan the body again.
+        """
+        members = {}
+        for name, value in _JSONScanner(self).members(stream_key=key):
+            if name == key:
+                yield value
+            else:
+                members[name] = value
+        if key == "entries":
+            self._members = members
+
+    def get(self, key: str) -> Any:  # noqa: ANN401
+        """Return a top-level member of the body, other than an array of entries.
+
+        When the entries were not decoded yet, e.g. while the next page is prefetched,
+        they are skipped over without being decoded.
+        """
+        if self._members is None:
+            self._members = dict(_JSONScanner(self).members(stream_key="entries", skip=True))
+        return self._members.get(key)
+
+
+class _JSONScanner:
+    """Decode the members of a top-level JSON object from a spooled body."""
+
+    def __init__(self, body: SpooledBody) -> None:
+        self.body = body
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.offset = 0
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int = READ_CHUNK_SIZE) -> bool:
+        if self.eof:
+            return False
+        chunk = self.body.read_at(self.offset, size)
+        self.offset += len(chunk)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.pos :] + self.decoder.decode(chunk, final=self.eof)
+        self.pos = 0
+        return bool(chunk)
+
+    def _peek(self) -> str:
+        while True:
+            self.pos = _match_end(_WHITESPACE, self.buffer, self.pos)
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos : self.pos + 1]
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            msg = f"Expected {char!r} at offset {self.offset - len(self.buffer) + self.pos}"
+            raise json.JSONDecodeError(msg, self.buffer, self.pos)
+        self.pos += 1
+
+    def _decode(self) -> Any:  # noqa: ANN401
+        self._peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Grow reads with the buffer, so a large value is decoded in linear time
+                if not self._fill(max(READ_CHUNK_SIZE, len(self.buffer))):
+                    raise
+                continue
+            if end == len(self.buffer) and self._fill():
+                # A number may continue in the next chunk
+                continue
+            self.pos = end
+            return value
+
+    def _skip_array(self) -> None:
+        """Move past the array starting at the current position, without decoding it."""
+        depth = 0
+        while True:
+            self.pos = _match_end(_NON_BRACKETS, self.buffer, self.pos)
+            if self.pos == len(self.buffer):
+                if not self._fill():
+                    msg = "Unterminated array"
+                    raise json.JSONDecodeError(msg, self.buffer, self.pos)
+                continue
+            if self.buffer[self.pos] == '"':
+                # A string continues in the next chunk
+                if not self._fill(max(READ_CHUNK_SIZE, len(self.buffer))):
+                    msg = "Unterminated string"
+                    raise json.JSONDecodeError(msg, self.buffer, self.pos)
+                continue
+
+            # Square brackets balance on their own, so objects need no tracking
+            depth += 1 if self.buffer[self.pos] == "[" else -1
+            self.pos += 1
+            if not depth:
+                return
+
+    def members(self, stream_key: str, *, skip: bool = False) -> Iterator[tuple[str, Any]]:
+        """Yield `(name, value)` members, and `(stream_key, item)` for each item.
+
+        With `skip`, the items of `stream_key` are skipped instead.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            name = self._decode()
+            self._expect(":")
+            if name == stream_key and skip and self._peek() == "[":
+                self._skip_array()
+            elif name == stream_key and self._peek() == "[":
+                self.pos += 1
+                if self._peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield name, self._decode()
+                        if self._peek() == "]":
+                            self.pos += 1
+                            break
+                        self._expect(",")
+            else:
+                yield name, self._decode()
+            if self._peek() == "}":
+                return
+            self._expect(",")
+
+
+def spooled_body(response: requests.Response) -> SpooledBody | None:
+    """Return the spooled body of a response, if it was too large for memory."""
+    return response.raw if isinstance(response.raw, SpooledBody) else None
+
+
+def spool_response(
+    response: requests.Response,
+    *,
+    max_memory: int,
+    slots: threading.BoundedSemaphore,
+    budget: MemoryBudget | None = None,
+) -> requests.Response:
+    """Download a streamed response, spooling its body to disk beyond `max_memory` bytes.
+
+    Only `slots` bodies larger than `max_memory` are downloaded at the same time.
+    Smaller bodies are loaded in memory as usual, unless the bodies already held in
+    memory use up the `budget`: they are then spooled to disk too.
+    """
+    # Closed once the response is garbage collected
+    file: tempfile.SpooledTemporaryFile[bytes] = tempfile.SpooledTemporaryFile(  # noqa: SIM115
+        max_size=max_memory,
+    )
+    acquired = False
+    reserved = 0
+    try:
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+            file.write(chunk)
+            if acquired:
+                continue
+            if file.tell() <= max_memory and (budget is None or budget.reserve(len(chunk))):
+                reserved += len(chunk)
+                continue
+
+            file.rollover()
+            if budget is not None:
+                budget.release(reserved)
+                reserved = 0
+            slots.acquire()
+            acquired = True
+    except BaseException:
+        file.close()
+        if budget is not None:
+            budget.release(reserved)
+        raise
+    finally:
+        if acquired:
+            slots.release()
+
+    file.seek(0)
+    if not acquired:
+        response._content = file.read()  # noqa: SLF001
+        file.close()
+        if budget is not None:
+            # The body stays in memory as long as the response
+            weakref.finalize(response, budget.release, reserved)
+        return response
+
+    wire_size = response.raw.tell() if hasattr(response.raw, "tell") else file.tell()
+    response.raw = SpooledBody(file, wire_size=wire_size)
+    response._content = False  # noqa: SLF001
+    response._content_consumed = False  # noqa: SLF001
+    return response
@@ -0,0 +1,158 @@
+"""Local store keeping the bulk of the tap state out of STATE messages."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+from tap_sigma.orgs import ORG_STATES_KEY
+
+
+class StateStoreError(Exception):
+    """The state a STATE message points to is missing from the store or corrupted."""
+
+
+def _digest(payload: str) -> str:
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _split(state: dict[str, Any], path: tuple[str, ...] = ()) -> list[tuple[list[str], Any]]:
+    """Split a state into the rest of the state, then the bookmarks of each stream and org."""
+    rest = dict(state)
+    bookmarks = rest.pop("bookmarks", None)
+    org_states = rest.pop(ORG_STATES_KEY, None)
+    if bookmarks is not None:
+        rest["bookmarks"] = {}
+    if org_states is not None:
+        rest[ORG_STATES_KEY] = {}
+
+    parts: list[tuple[list[str], Any]] = [(list(path), rest)]
+    for stream, value in (bookmarks or {}).items():
+        parts.append(([*path, "bookmarks", stream], value))
+    for org, org_state in (org_states or {}).items():
+        parts.extend(_split(org_state, (*path, ORG_STATES_KEY, org)))
+    return parts
+
+
+def _join(parts: list[tuple[list[str], Any]]) -> dict[str, Any]:
+    state: dict[str, Any] = {}
+    for path, value in parts:
+        if not path:
+            state = value
+            continue
+        parent = state
+        for key in path[:-1]:
+            parent = parent[key]
+        parent[path[-1]] = value
+    return state
+
+
+class StateStore:
+    """SQLite store of tap states, addressed by checksum.
+
+    The bookmarks of each stream are stored once per distinct value, so saving a state
+    only writes the streams whose bookmarks changed. Every saved state stays readable
+    until a later run starts from a newer one, so the checksum last committed by the
+    target always resolves, even if the tap failed after saving newer states.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open or create the store.
+
+        Args:
+            path: Path of the SQLite database file.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._blobs: set[str] = set()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "digest TEXT PRIMARY KEY, "
+            "value TEXT NOT NULL"
+            ") WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS manifests ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "checksum TEXT NOT NULL UNIQUE, "
+            "parts TEXT NOT NULL"
+            ");",
+        )
+
+    def save(self, state: dict[str, Any]) -> dict[str, str]:
+        """Store a state and return the pointer emitted in its place."""
+        manifest = []
+        with self._lock:
+            for path, value in _split(state):
+                payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+                digest = _digest(payload)
+                if digest not in self._blobs:
+                    self._connection.execute(
+                        "INSERT OR IGNORE INTO blobs (digest, value) VALUES (?, ?)",
+                        (digest, payload),
+                    )
+                    self._blobs.add(digest)
+                manifest.append((path, digest))
+
+            parts = json.dumps(manifest, separators=(",", ":"))
+            checksum = _digest(parts)
+            self._connection.execute(
+                "INSERT OR IGNORE INTO manifests (checksum, parts) VALUES (?, ?)",
+                (checksum, parts),
+            )
+            self._connection.commit()
+        return {"path": str(self.path), "checksum": checksum}
+
+    def load(self, pointer: dict[str, str]) -> dict[str, Any]:
+        """Return the state a pointer refers to, verifying its checksum."""
+        checksum = pointer["checksum"]
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT parts FROM manifests WHERE checksum = ?",
+                (checksum,),
+            ).fetchone()
+            if row is None or _digest(row[0]) != checksum:
+                msg = f"State {checksum} not found in {self.path}"
+                raise StateStoreError(msg)
+
+            parts = []
+            for path, digest in json.loads(row[0]):
+                blob = self._connection.execute(
+                    "SELECT value FROM blobs WHERE digest = ?",
+                    (digest,),
+                ).fetchone()
+                if blob is None or _digest(blob[0]) != digest:
+                    msg = f"State {checksum} in {self.path} is corrupted"
+                    raise StateStoreError(msg)
+                parts.append((path, json.loads(blob[0])))
+        return _join(parts)
+
+    def prune(self, checksum: str) -> None:
+        """Delete the states saved before the one a run starts from."""
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM manifests WHERE id < (SELECT id FROM manifests WHERE checksum = ?)",
+                (checksum,),
+            )
+            referenced = {
+                digest
+                for (parts,) in self._connection.execute("SELECT parts FROM manifests")
+                for _, digest in json.loads(parts)
+            }
+            unreferenced = [
+                (digest,)
+                for (digest,) in self._connection.execute("SELECT digest FROM blobs")
+                if digest not in referenced
+            ]
+            self._connection.executemany("DELETE FROM blobs WHERE digest = ?", unreferenced)
+            self._connection.commit()
+            self._blobs &= referenced
+
+    def close(self) -> None:
+        """Close the store."""
+        with self._lock:
+            self._connection.close()
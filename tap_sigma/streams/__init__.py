@@ -1,10 +1,11 @@
 """Stream definitions for Sigma Computing API."""  # ruff: ignore[CPY001]
 
-from . import data_models, generic, members, workbooks
+from . import data_models, generic, members, text_blobs, workbooks
 
 __all__ = [
     "data_models",
     "generic",
     "members",
+    "text_blobs",
     "workbooks",
 ]
@@ -32,6 +32,10 @@ class DataModelsStream(SigmaStream):
     primary_keys = ("dataModelId",)
     replication_key = None
     schema = StreamSchema(SCHEMAS)
+    ids_setting = "data_model_ids"
+    required_properties = ("isArchived", "updatedAt")
+    priority_key = "updatedAt"
+    sample_group_key = "path"
 
     @override
     def get_child_context(
@@ -63,7 +67,7 @@ class DataModelColumnsStream(SigmaChildStream):
     @override
     def get_new_paginator(self) -> SigmaStringPagePaginator:
         """Get a new paginator."""
-        return SigmaStringPagePaginator(start_value=None)
+        return SigmaStringPagePaginator(start_value=None, max_pages=self.max_pages)
 
 
 class DataModelElementsStream(SigmaChildStream):
@@ -87,6 +91,7 @@ class DatamodelSourcesStream(SigmaChildStream):
     path = "/v2/dataModels/{_sdc_data_model_id}/sources"
     primary_keys = ("_sdc_data_model_id", "_sdc_source_id")
     parent_stream_type = DataModelsStream
+    required_properties = ("type",)
 
     next_page_token_jsonpath = "$.nextPageToken"  # noqa: S105
 
@@ -117,30 +122,34 @@ class DatamodelSourcesStream(SigmaChildStream):
         },
     }
 
+    #: Property holding the source ID of each type of source, and where it is copied to
+    source_id_properties: ClassVar[dict[str, tuple[str, str]]] = {
+        "data-model": ("dataModelId", "sourceDataModelId"),
+        "dataset": ("datasetId", "sourceDatasetId"),
+        "table": ("tableId", "sourceTableId"),
+        "custom-sql": ("customSqlId", "sourceCustomSqlId"),
+    }
+
     @override
-    def post_process(self, row: Record, context: Context | None = None) -> Record | None:
-        match row.get("type"):
-            case "data-model":
-                row["sourceDataModelId"] = row["dataModelId"]
-                row["_sdc_source_id"] = row["dataModelId"]
-            case "dataset":
-                row["sourceDatasetId"] = row["datasetId"]
-                row["_sdc_source_id"] = row["datasetId"]
-            case "table":
-                row["sourceTableId"] = row["tableId"]
-                row["_sdc_source_id"] = row["tableId"]
-            case "custom-sql":
-                row["sourceCustomSqlId"] = row["customSqlId"]
-                row["_sdc_source_id"] = row["customSqlId"]
-            case _:
+    def transform_page(self, records: list[dict], context: Context | None) -> list[dict]:
+        source_id_properties = self.source_id_properties
+        transformed = []
+        for row in records:
+            source_type = row.get("type")
+            properties = None if source_type is None else source_id_properties.get(source_type)
+            if properties is None:
                 self.log(
                     "Unknown data model source type '%s', skipping record.",
-                    row.get("type"),
+                    source_type,
                     level=logging.WARNING,
                 )
-                return None
+                continue
+
+            id_property, source_property = properties
+            row[source_property] = row["_sdc_source_id"] = row[id_property]
+            transformed.append(row)
 
-        return row
+        return transformed
 
 
 class DataModelTagsStream(SigmaChildStream):
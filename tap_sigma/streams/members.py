@@ -17,8 +17,6 @@ else:
     from typing_extensions import override
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
-
     from singer_sdk.helpers.types import Context, Record
 
 
@@ -44,12 +42,13 @@ class MembersStream(SigmaStream):
         }
 
     @override
-    def generate_child_contexts(
+    def get_child_context(
         self,
         record: Record,
-        context: Context | None,
-    ) -> Iterable[Context | None]:
-        yield {"memberId": record["memberId"]}
+        context: Context | None = None,
+    ) -> Context | None:
+        """Return context for child streams."""
+        return {"memberId": record["memberId"]}
 
 
 # Member child streams
@@ -0,0 +1,70 @@
+"""Stream definition for deduplicated text bodies."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import hashlib
+import sys
+from typing import TYPE_CHECKING, Any, ClassVar
+
+from singer_sdk import typing as th
+
+from tap_sigma.client import ORG_PROPERTY, SigmaStream
+
+if sys.version_info >= (3, 12):
+    from typing import override
+else:
+    from typing_extensions import override
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from singer_sdk.helpers.types import Context
+
+
+class TextBlobsStream(SigmaStream):
+    """Distinct bodies of large text properties, such as SQL text or formulas.
+
+    Streams with the `deduplicate_properties` option replace those properties with the
+    SHA-256 hash of their value, and each distinct body is emitted here once per run
+    and org, or once ever when `record_index_path` is set.
+    """
+
+    name = "text_blobs"
+    primary_keys = ("hash",)
+    replication_key = None
+    schema: ClassVar[dict[str, Any]] = th.PropertiesList(
+        th.Property("hash", th.StringType, required=True, description="SHA-256 of the body"),
+        th.Property("body", th.StringType, description="Text body"),
+    ).to_dict()
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the stream."""
+        super().__init__(*args, **kwargs)
+        self._seen: set[str] = set()
+
+    @override
+    def request_records(self, context: Context | None) -> Iterable[dict[str, Any]]:
+        """Return no records, bodies are emitted while syncing other streams."""
+        return []
+
+    @override
+    def write_deletion_markers(self) -> int:
+        """Never report bodies as deleted, since they are only referenced by other records."""
+        return 0
+
+    def store(self, body: str) -> str:
+        """Emit a text body unless already emitted and return its hash."""
+        digest = hashlib.sha256(body.encode()).hexdigest()
+        if digest in self._seen:
+            return digest
+
+        if not self._seen:
+            self._write_schema_message()
+        self._seen.add(digest)
+
+        record = {"hash": digest, "body": body}
+        if (org_name := self.org_name) is not None:
+            record[ORG_PROPERTY] = org_name
+        # Bodies already emitted by a previous run are skipped with `record_index_path`
+        self._write_record_message(record)
+        return digest
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import sys
 from importlib import resources
-from typing import TYPE_CHECKING, Any, ClassVar
+from typing import TYPE_CHECKING, Any, ClassVar, cast
 
 from singer_sdk import SchemaDirectory, StreamSchema
 
@@ -17,11 +17,17 @@ else:
     from typing_extensions import override
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from singer_sdk.helpers.types import Context, Record
 
 SCHEMAS = SchemaDirectory(resources.files(schemas_module))
 
 
+def _crawl_key(stream_name: str, context: Context | None) -> tuple[str, tuple]:
+    return stream_name, tuple(sorted((context or {}).items()))
+
+
 class WorkbooksStream(SigmaStream):
     """Workbooks stream."""
 
@@ -30,6 +36,10 @@ class WorkbooksStream(SigmaStream):
     primary_keys = ("workbookId",)
     replication_key = None
     schema = StreamSchema(SCHEMAS)
+    ids_setting = "workbook_ids"
+    required_properties = ("isArchived", "updatedAt")
+    priority_key = "updatedAt"
+    sample_group_key = "path"
 
     @override
     def get_child_context(
@@ -43,6 +53,15 @@ class WorkbooksStream(SigmaStream):
 
         return {"workbookId": record["workbookId"]}
 
+    @override
+    def _sync_children(self, child_context: Context | None) -> None:
+        """Sync the children of a workbook, then drop what is left of its page crawl."""
+        try:
+            super()._sync_children(child_context)
+        finally:
+            elements = cast("WorkbookElementsStream", self.tap.streams["workbook_elements"])
+            elements.clear_crawled()
+
 
 # Workbook child streams
 class WorkbookColumnsStream(SigmaChildStream):
@@ -61,7 +80,7 @@ class WorkbookColumnsStream(SigmaChildStream):
     @override
     def get_new_paginator(self) -> SigmaStringPagePaginator:
         """Get a new paginator."""
-        return SigmaStringPagePaginator(start_value=None)
+        return SigmaStringPagePaginator(start_value=None, max_pages=self.max_pages)
 
 
 class WorkbookControlsStream(SigmaChildStream):
@@ -91,6 +110,76 @@ class WorkbookElementsStream(SigmaChildStream):
     schema = StreamSchema(SCHEMAS)
     parent_stream_type = WorkbooksStream
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the stream."""
+        super().__init__(*args, **kwargs)
+        self._crawled: dict[tuple[str, tuple], list[dict]] = {}
+
+    @property
+    def crawls_pages(self) -> bool:
+        """Whether elements are taken from the page crawl of `workbook_page_elements`.
+
+        Only when `workbook_elements_strategy` is `pages`, `workbook_page_elements` is
+        selected and keeps every property selected for this stream.
+        """
+        if self.config.get("workbook_elements_strategy") != "pages":
+            return False
+        page_elements = cast("SigmaStream", self.tap.streams["workbook_page_elements"])
+        missing = set(page_elements.deselected_properties) - set(self.deselected_properties)
+        return page_elements.selected and missing <= {"pageId"}
+
+    def crawl_pages(self, context: Context | None) -> Iterable[dict]:
+        """Fetch the pages of a workbook and their elements.
+
+        The records are kept for `workbook_pages` and `workbook_page_elements`, which
+        are synced after this stream for the same workbook.
+        """
+        pages_stream = cast("CrawledPagesStream", self.tap.streams["workbook_pages"])
+        page_elements = cast("CrawledPagesStream", self.tap.streams["workbook_page_elements"])
+        self._crawled = {}
+
+        pages = list(pages_stream.request_records(context))
+        self._crawled[_crawl_key(pages_stream.name, context)] = pages
+        for page in pages:
+            page_context = {**(context or {}), "pageId": page["pageId"]}
+            records = list(page_elements.request_records(page_context))
+            self._crawled[_crawl_key(page_elements.name, page_context)] = records
+            yield from records
+
+    def pop_crawled(self, stream_name: str, context: Context | None) -> list[dict] | None:
+        """Return the crawled records of a page stream, if this stream fetched them."""
+        return self._crawled.pop(_crawl_key(stream_name, context), None)
+
+    def clear_crawled(self) -> None:
+        """Drop the crawled records which no page stream took, e.g. of skipped contexts."""
+        self._crawled = {}
+
+    @override
+    def request_records(self, context: Context | None) -> Iterable[dict]:
+        """Request elements, or join the elements of every page under the `pages` strategy."""
+        if not self.crawls_pages:
+            yield from super().request_records(context)
+            return
+
+        seen: set[str] = set()
+        for record in self.crawl_pages(context):
+            if record["elementId"] not in seen:
+                seen.add(record["elementId"])
+                yield {name: value for name, value in record.items() if name != "pageId"}
+
+
+class CrawledPagesStream(SigmaChildStream):
+    """Base class for page streams reusing the page crawl of `workbook_elements`."""
+
+    @override
+    def request_records(self, context: Context | None) -> Iterable[dict]:
+        """Yield the records crawled by `workbook_elements`, or request them."""
+        elements = cast("WorkbookElementsStream", self.tap.streams["workbook_elements"])
+        if (records := elements.pop_crawled(self.name, context)) is not None:
+            yield from records
+            return
+        yield from super().request_records(context)
+
 
 class WorkbookMaterializationSchedulesStream(SigmaChildStream):
     """Workbook materialization schedules stream."""
@@ -103,7 +192,7 @@ class WorkbookMaterializationSchedulesStream(SigmaChildStream):
     parent_stream_type = WorkbooksStream
 
 
-class WorkbookPagesStream(SigmaChildStream):
+class WorkbookPagesStream(CrawledPagesStream):
     """Workbook pages stream (child of workbooks)."""
 
     name = "workbook_pages"
@@ -112,6 +201,7 @@ class WorkbookPagesStream(SigmaChildStream):
     replication_key = None
     schema = StreamSchema(SCHEMAS)
     parent_stream_type = WorkbooksStream
+    sample_group_key = "workbookId"
 
     @override
     def get_child_context(
@@ -126,7 +216,7 @@ class WorkbookPagesStream(SigmaChildStream):
         }
 
 
-class WorkbookPageElementsStream(SigmaChildStream):
+class WorkbookPageElementsStream(CrawledPagesStream):
     """Workbook page elements stream."""
 
     name = "workbook_page_elements"
@@ -150,7 +240,7 @@ class WorkbookQueriesStream(SigmaChildStream, default_page_size=50):
     @override
     def get_new_paginator(self) -> SigmaStringPagePaginator:
         """Get a new paginator."""
-        return SigmaStringPagePaginator(start_value=None)
+        return SigmaStringPagePaginator(start_value=None, max_pages=self.max_pages)
 
 
 class WorkbookSchedulesStream(SigmaChildStream):
@@ -175,6 +265,7 @@ class WorkbookSourcesStream(SigmaChildStream):
     primary_keys = ("workbookId", "_sdc_source_id")
     replication_key = None
     parent_stream_type = WorkbooksStream
+    required_properties = ("type",)
 
     schema: ClassVar[dict[str, Any]] = {
         "type": "object",
@@ -200,17 +291,15 @@ class WorkbookSourcesStream(SigmaChildStream):
     }
 
     @override
-    def post_process(self, row: Record, context: Context | None = None) -> Record | None:
-        source_type = row["type"]
-        if data_model_id := row.pop("dataModelId", None):
-            row["sourceDataModelId"] = data_model_id
-            row["_sdc_source_id"] = data_model_id
-        if inode_id := row.pop("inodeId", None):
-            key = "sourceDatasetId" if source_type == "dataset" else "sourceTableId"
-            row[key] = inode_id
-            row["_sdc_source_id"] = inode_id
-
-        return row
+    def transform_page(self, records: list[dict], context: Context | None) -> list[dict]:
+        for row in records:
+            if data_model_id := row.pop("dataModelId", None):
+                row["sourceDataModelId"] = row["_sdc_source_id"] = data_model_id
+            if inode_id := row.pop("inodeId", None):
+                key = "sourceDatasetId" if row["type"] == "dataset" else "sourceTableId"
+                row[key] = row["_sdc_source_id"] = inode_id
+
+        return records
 
     @override
     def get_url_params(
@@ -2,12 +2,29 @@
 
 from __future__ import annotations
 
+import atexit
+import json
 import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import cached_property
+from pathlib import Path
+from typing import Any, cast
 
+import click
 from singer_sdk import Stream, Tap
 from singer_sdk import typing as th
 
 from tap_sigma import streams
+from tap_sigma.cassette import Cassette, get_cassette
+from tap_sigma.client import DEFERRED_STATE_KEY, SigmaChildStream, SigmaStream
+from tap_sigma.orgs import ORG_STATES_KEY, STATE_STORE_KEY, MultiOrgWriter, OrgWriter
+from tap_sigma.planner import SyncPlanner
+from tap_sigma.progress import ProgressReporter, get_progress_reporter
+from tap_sigma.record_index import RecordIndex
+from tap_sigma.state_store import StateStore
+from tap_sigma.transport import DEFAULT_POOL_MAXSIZE, SUPPORTED_ENCODINGS
+from tap_sigma.workers import get_parse_pool, shutdown_parse_pools
 
 if sys.version_info >= (3, 12):
     from typing import override
@@ -21,6 +38,9 @@ try:
 except ImportError:
     pass
 
+# Click context key of the `--config` arguments, read again by `--plan`
+CONFIG_SOURCES_KEY = "tap_sigma.config_sources"
+
 
 class TapSigma(Tap):
     """Sigma Computing tap class."""
@@ -51,6 +71,52 @@ class TapSigma(Tap):
                 "(e.g., https://aws-api.sigmacomputing.com)"
             ),
         ),
+        th.Property(
+            "org_name",
+            th.StringType,
+            description=(
+                "Name of the organization, added to every record as `_sdc_org` and to "
+                "the primary keys. Defaults to `default` when `orgs` is set."
+            ),
+        ),
+        th.Property(
+            "orgs",
+            th.ArrayType(
+                th.ObjectType(
+                    th.Property(
+                        "name",
+                        th.StringType,
+                        required=True,
+                        description="Unique name of the organization, tagged as `_sdc_org`",
+                    ),
+                    th.Property(
+                        "api_url",
+                        th.StringType,
+                        required=True,
+                        description="Base API URL of the organization",
+                    ),
+                    th.Property(
+                        "client_id",
+                        th.StringType,
+                        required=True,
+                        secret=True,
+                        description="API Client ID of the organization",
+                    ),
+                    th.Property(
+                        "client_secret",
+                        th.StringType,
+                        required=True,
+                        secret=True,
+                        description="API Client Secret of the organization",
+                    ),
+                ),
+            ),
+            description=(
+                "Additional organizations synced concurrently with the one configured "
+                "by `api_url`, `client_id` and `client_secret`. Other settings apply "
+                "to every organization."
+            ),
+        ),
         th.Property(
             "stream_options",
             th.ObjectType(
@@ -60,6 +126,59 @@ class TapSigma(Tap):
                         th.IntegerType,
                         description="The number of records to fetch per page.",
                     ),
+                    th.Property(
+                        "parallel_pages",
+                        th.IntegerType,
+                        description=(
+                            "Number of numbered pages requested concurrently once the "
+                            "first page shows there are more."
+                        ),
+                    ),
+                    th.Property(
+                        "prefetch_pages",
+                        th.IntegerType,
+                        description=(
+                            "Number of pages requested in the background ahead of the "
+                            "page whose records are being processed."
+                        ),
+                    ),
+                    th.Property(
+                        "timeout",
+                        th.IntegerType,
+                        description="Request timeout in seconds.",
+                    ),
+                    th.Property(
+                        "hedge_requests",
+                        th.BooleanType,
+                        description=(
+                            "Send a duplicate of requests slower than the observed p95 "
+                            "latency and use whichever response arrives first."
+                        ),
+                    ),
+                    th.Property(
+                        "hedge_budget",
+                        th.NumberType,
+                        description=(
+                            "Maximum ratio of duplicate requests to all requests. Defaults to 0.05."
+                        ),
+                    ),
+                    th.Property(
+                        "deduplicate_properties",
+                        th.ArrayType(th.StringType),
+                        description=(
+                            "Properties whose values are replaced with their SHA-256 hash, "
+                            "with each distinct value emitted once to the `text_blobs` "
+                            "stream."
+                        ),
+                    ),
+                    th.Property(
+                        "batch",
+                        th.BooleanType,
+                        description=(
+                            "Whether to emit BATCH messages for this stream when "
+                            "`batch_config` is set."
+                        ),
+                    ),
                 ),
             ),
             description="Options which change the behaviour of a specific stream.",
@@ -69,6 +188,282 @@ class TapSigma(Tap):
             th.DateTimeType,
             description="Earliest record date to sync",
         ),
+        th.Property(
+            "max_requests_per_second",
+            th.NumberType,
+            description=(
+                "Maximum number of API requests per second across all streams. "
+                "Also used to estimate the duration of a sync with `--plan`."
+            ),
+        ),
+        th.Property(
+            "parse_workers",
+            th.IntegerType,
+            description=(
+                "Number of worker processes decoding and transforming response pages, "
+                "so the tap can use several CPU cores. Most effective along with the "
+                "`parallel_pages` or `prefetch_pages` stream options."
+            ),
+        ),
+        th.Property(
+            "circuit_breaker_error_rate",
+            th.NumberType,
+            description=(
+                "Share of failed requests to an endpoint, between 0 and 1, which stops "
+                "the remaining child contexts of that endpoint from being requested."
+            ),
+        ),
+        th.Property(
+            "circuit_breaker_window",
+            th.IntegerType,
+            default=20,
+            description=(
+                "Number of most recent requests the error rate of an endpoint is computed over."
+            ),
+        ),
+        th.Property(
+            "circuit_breaker_probe_interval",
+            th.NumberType,
+            default=60,
+            description=(
+                "Number of seconds between requests probing a failing endpoint for recovery."
+            ),
+        ),
+        th.Property(
+            "transport",
+            th.ObjectType(
+                th.Property(
+                    "compression",
+                    th.ArrayType(th.StringType),
+                    description=(
+                        "Content encodings offered to the API, among "
+                        f"{', '.join(SUPPORTED_ENCODINGS)}. Defaults to all of them, and an "
+                        "empty list disables compression."
+                    ),
+                ),
+                th.Property(
+                    "pool_maxsize",
+                    th.IntegerType,
+                    description=(
+                        "Number of connections kept alive per org. Defaults to the number of "
+                        "concurrent requests allowed by the stream options, and at least 10."
+                    ),
+                ),
+                th.Property(
+                    "connect_timeout",
+                    th.NumberType,
+                    description="Seconds to wait for a connection to the API.",
+                ),
+                th.Property(
+                    "read_timeout",
+                    th.NumberType,
+                    description=(
+                        "Seconds to wait between bytes of a response. Defaults to the "
+                        "`timeout` stream option."
+                    ),
+                ),
+                th.Property(
+                    "keep_alive",
+                    th.BooleanType,
+                    description=(
+                        "Whether connections are reused between requests. Defaults to true."
+                    ),
+                ),
+            ),
+            description="HTTP settings of the API and token requests.",
+        ),
+        th.Property(
+            "max_response_memory",
+            th.IntegerType,
+            description=(
+                "Maximum size in bytes of a response body held in memory. Larger bodies "
+                "are spooled to a temporary file and parsed incrementally from disk."
+            ),
+        ),
+        th.Property(
+            "max_large_responses",
+            th.IntegerType,
+            default=1,
+            description=(
+                "Maximum number of responses larger than `max_response_memory` "
+                "downloaded at the same time, across all streams and orgs."
+            ),
+        ),
+        th.Property(
+            "max_total_response_memory",
+            th.IntegerType,
+            description=(
+                "Maximum number of bytes of response bodies held in memory at the same "
+                "time, across all streams and orgs. Bodies received beyond it are spooled "
+                "to disk, even when smaller than `max_response_memory`."
+            ),
+        ),
+        th.Property(
+            "record_index_path",
+            th.StringType,
+            description=(
+                "Path to a local SQLite file holding a hash of every emitted record. "
+                "When set, only records that are new or changed since the last "
+                "successful run are emitted."
+            ),
+        ),
+        th.Property(
+            "detect_deletes",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Emit records flagged with `_sdc_deleted_at` for the primary keys that "
+                "disappeared since the last run. Requires `record_index_path`."
+            ),
+        ),
+        th.Property(
+            "max_runtime",
+            th.IntegerType,
+            description=(
+                "Time budget of a sync in seconds. Children of the most recently "
+                "updated workbooks and data models are synced first, and the next run "
+                "resumes with the parents left over."
+            ),
+        ),
+        th.Property(
+            "priority_ids",
+            th.ArrayType(th.StringType),
+            description=(
+                "Workbook and data model IDs whose children are synced before any "
+                "other when `max_runtime` is set."
+            ),
+        ),
+        th.Property(
+            "workbook_elements_strategy",
+            th.StringType,
+            default="elements",
+            allowed_values=["elements", "pages"],
+            description=(
+                "How `workbook_elements` is fetched when `workbook_page_elements` is also "
+                "selected: from its own endpoint, or joined from the elements of every "
+                "page, so each workbook is crawled once."
+            ),
+        ),
+        th.Property(
+            "sample",
+            th.ObjectType(
+                th.Property(
+                    "per_workspace",
+                    th.IntegerType,
+                    description=(
+                        "Number of workbooks and data models per workspace, pages per "
+                        "workbook, and members whose children are synced."
+                    ),
+                ),
+                th.Property(
+                    "percent",
+                    th.NumberType,
+                    description="Percentage of parents whose children are synced, by ID hash.",
+                ),
+                th.Property(
+                    "seed",
+                    th.StringType,
+                    description="Seed of the ID hash, to draw a different sample.",
+                ),
+                th.Property(
+                    "max_pages",
+                    th.IntegerType,
+                    description="Maximum number of pages requested per stream and context.",
+                ),
+            ),
+            description=(
+                "Sync a deterministic sample of child contexts, for fast dev and QA runs."
+            ),
+        ),
+        th.Property(
+            "schedule_by_cost",
+            th.BooleanType,
+            default=False,
+            description=(
+                "Record the time spent on the children of each workbook, data model and "
+                "member in the state, and sync the children of the slowest parents first "
+                "on later runs."
+            ),
+        ),
+        th.Property(
+            "progress_interval",
+            th.IntegerType,
+            description=(
+                "Number of seconds between structured `PROGRESS` log lines reporting the "
+                "contexts, records, request rate and ETA of each stream."
+            ),
+        ),
+        th.Property(
+            "progress_port",
+            th.IntegerType,
+            description=(
+                "Port of a local HTTP endpoint serving the progress of each stream as "
+                "JSON on `/status`."
+            ),
+        ),
+        th.Property(
+            "state_store_path",
+            th.StringType,
+            description=(
+                "Path to a local SQLite file holding the tap state. STATE messages then "
+                "only hold a pointer to the saved state and its checksum."
+            ),
+        ),
+        th.Property(
+            "parent_snapshot_dir",
+            th.StringType,
+            description=(
+                "Directory of snapshots of the workbooks, data models and members listed "
+                "only to sync their child streams, reused by later jobs instead of "
+                "listing them again."
+            ),
+        ),
+        th.Property(
+            "parent_snapshot_ttl",
+            th.IntegerType,
+            default=3600,
+            description="Number of seconds a parent snapshot can be reused for.",
+        ),
+        th.Property(
+            "cassette_path",
+            th.StringType,
+            description=(
+                "Path to a gzip-compressed cassette of API responses, recorded or "
+                "replayed depending on `cassette_mode`."
+            ),
+        ),
+        th.Property(
+            "cassette_mode",
+            th.StringType,
+            default="replay",
+            allowed_values=["record", "replay"],
+            description=(
+                "Whether to record the API responses of the sync to `cassette_path`, or "
+                "to serve them from it without any network access."
+            ),
+        ),
+        th.Property(
+            "cassette_latency",
+            th.BooleanType,
+            default=False,
+            description="Whether replayed responses wait for their recorded duration.",
+        ),
+        th.Property(
+            "workbook_ids",
+            th.ArrayType(th.StringType),
+            description=(
+                "Only sync these workbooks and their child streams, "
+                "instead of listing every workbook in the organization"
+            ),
+        ),
+        th.Property(
+            "data_model_ids",
+            th.ArrayType(th.StringType),
+            description=(
+                "Only sync these data models and their child streams, "
+                "instead of listing every data model in the organization"
+            ),
+        ),
     ).to_dict()
 
     @override
@@ -106,8 +501,287 @@ class TapSigma(Tap):
             streams.workbooks.WorkbookQueriesStream(self),
             streams.workbooks.WorkbookSchedulesStream(self),
             streams.workbooks.WorkbookSourcesStream(self),
+            # Deduplicated text bodies
+            streams.text_blobs.TextBlobsStream(self),
+        ]
+
+    message_writer_class = MultiOrgWriter
+
+    #: Set when some parent contexts were not synced during this run.
+    sync_incomplete = False
+
+    #: Number of child contexts deferred by an open circuit breaker or the time budget.
+    deferred_contexts = 0
+
+    #: Syncs of the additional `orgs`, running in their own threads.
+    _org_syncs: tuple[Future[None], ...] = ()
+
+    @override
+    def load_state(self, state: dict[str, Any]) -> None:
+        """Load the state of this org, keeping the state of the other orgs apart.
+
+        A pointer to the external state store is replaced by the state it refers to.
+        Streams deferred by the previous run, once its `max_runtime` budget was spent,
+        are synced first.
+        """
+        if (pointer := state.get(STATE_STORE_KEY)) is not None:
+            store = self.state_store or StateStore(pointer["path"])
+            state = store.load(pointer)
+            store.prune(pointer["checksum"])
+        super().load_state(state)
+        deferred = [
+            name
+            for name, stream_state in state.get("bookmarks", {}).items()
+            if stream_state.get(DEFERRED_STATE_KEY)
+        ]
+        if deferred:
+            self.sync_first(deferred)
+        self._org_states: dict[str, dict[str, Any]] = state.get(ORG_STATES_KEY, {})
+        if isinstance(self.message_writer, MultiOrgWriter):
+            self.message_writer.state_store = self.state_store
+            self.message_writer.load_org_states(self._org_states)
+
+    def sync_first(self, names: list[str]) -> None:
+        """Move the given streams ahead of the others, in the order `sync_all` syncs them."""
+        self.logger.info("Syncing %s first", ", ".join(names))
+        streams = self.streams
+        for name in [name for name in streams if name not in names]:
+            streams[name] = streams.pop(name)
+
+    def create_org_tap(self, org: dict[str, Any]) -> TapSigma:
+        """Create the tap syncing one of the additional `orgs`."""
+        name = org["name"]
+        config: dict[str, Any] = {**self.config, **org, "org_name": name, "orgs": []}
+        del config["name"]
+        if record_index_path := config.get("record_index_path"):
+            path = Path(record_index_path)
+            config["record_index_path"] = str(path.with_name(f"{path.stem}-{name}{path.suffix}"))
+
+        writer = cast("MultiOrgWriter", self.message_writer)
+        return type(self)(
+            config=config,
+            catalog=self.input_catalog,
+            state=self._org_states.get(name, {}),
+            validate_config=False,
+            message_writer=writer.for_org(name),
+        )
+
+    @property
+    def out_of_time(self) -> bool:
+        """Whether the `max_runtime` budget of this run is spent."""
+        if not (max_runtime := self.config.get("max_runtime")):
+            return False
+        return time.time() - self.initialized_at / 1000 > max_runtime
+
+    @cached_property
+    def record_index(self) -> RecordIndex | None:
+        """Return the index of emitted record hashes, if change detection is enabled."""
+        if path := self.config.get("record_index_path"):
+            return RecordIndex(path)
+        return None
+
+    @cached_property
+    def state_store(self) -> StateStore | None:
+        """Return the external store of the tap state, if `state_store_path` is set."""
+        if path := self.config.get("state_store_path"):
+            return StateStore(path)
+        return None
+
+    @cached_property
+    def progress(self) -> ProgressReporter | None:
+        """Return the progress reporter, if `progress_interval` or `progress_port` is set."""
+        interval = self.config.get("progress_interval")
+        port = self.config.get("progress_port")
+        if interval or port is not None:
+            return get_progress_reporter(self.logger, interval, port)
+        return None
+
+    @cached_property
+    def cassette(self) -> Cassette | None:
+        """Return the cassette of API responses, if `cassette_path` is set."""
+        if path := self.config.get("cassette_path"):
+            return get_cassette(
+                path,
+                self.config.get("cassette_mode", "replay"),
+                latency=self.config.get("cassette_latency", False),
+            )
+        return None
+
+    @property
+    def pool_maxsize(self) -> int:
+        """Return the connection pool size of this org, sized to its concurrent requests."""
+        if pool_maxsize := (self.config.get("transport") or {}).get("pool_maxsize"):
+            return pool_maxsize
+
+        concurrency = 1
+        for options in (self.config.get("stream_options") or {}).values():
+            connections = 1 + max(
+                options.get("parallel_pages", 0),
+                options.get("prefetch_pages", 0),
+            )
+            concurrency += connections * 2 if options.get("hedge_requests") else connections
+        return max(concurrency, DEFAULT_POOL_MAXSIZE)
+
+    @property
+    def parse_pool(self) -> ProcessPoolExecutor | None:
+        """Return the process pool decoding pages, if `parse_workers` is set."""
+        workers = self.config.get("parse_workers") or 0
+        if workers > 1:
+            return get_parse_pool(workers, self.config)
+        return None
+
+    @cached_property
+    def top_level_streams(self) -> list[Stream]:
+        """Return the streams synced by `sync_all` itself, in the order they are synced."""
+        return [
+            stream
+            for stream in self.streams.values()
+            if not stream.parent_stream_type
+            and (stream.selected or stream.has_selected_descendents)
         ]
 
+    @property
+    def is_main_org(self) -> bool:
+        """Whether this tap syncs the main org, rather than one of the additional `orgs`."""
+        return not isinstance(self.message_writer, OrgWriter)
+
+    def start_sync(self) -> None:
+        """Start reporting progress and syncing the additional `orgs`, each in its own thread.
+
+        Called by the first stream synced by `sync_all`. The resources shared by every org
+        are released when the process exits, should the sync fail.
+        """
+        if not self.is_main_org:
+            return
+
+        atexit.register(self.close)
+        if self.state_store is not None:
+            atexit.register(self.state_store.close)
+        if self.progress is not None:
+            self.progress.start()
+        if orgs := self.config.get("orgs"):
+            executor = ThreadPoolExecutor(max_workers=len(orgs), thread_name_prefix="sigma-org")
+            self._org_syncs = tuple(
+                executor.submit(self.create_org_tap(org).sync_all) for org in orgs
+            )
+            executor.shutdown(wait=False)
+
+    def finish_sync(self) -> None:
+        """Finish the sync of this org, once the records of its last stream were synced.
+
+        Called by the last stream synced by `sync_all`, before its final STATE message,
+        so deletion markers are emitted and the record index is committed before a target
+        checkpoints the state. The main org first waits for the other orgs.
+        """
+        for org_sync in self._org_syncs:
+            org_sync.result()
+        for stream in self.streams.values():
+            if isinstance(stream, SigmaChildStream):
+                stream.log_circuit_breaker()
+            if isinstance(stream, SigmaStream):
+                stream.close()
+        if self.record_index is not None:
+            if self.config.get("detect_deletes"):
+                self.write_deletion_markers()
+            self.record_index.commit()
+        if self.is_main_org:
+            self.close()
+
+    def close(self) -> None:
+        """Stop reporting progress and release the resources shared by every org.
+
+        The state store is left open for the final STATE message, and closed on exit.
+        """
+        if self.progress is not None:
+            self.progress.stop()
+        if self.cassette is not None:
+            self.cassette.close()
+        shutdown_parse_pools()
+
+    def write_deletion_markers(self) -> None:
+        """Emit deletion markers for the selected streams after a complete sync."""
+        if self.config.get("workbook_ids") or self.config.get("data_model_ids"):
+            self.logger.info("Skipping delete detection for a targeted sync")
+            return
+
+        if self.sync_incomplete:
+            self.logger.info("Skipping delete detection for an incomplete sync")
+            return
+
+        for stream in self.streams.values():
+            if stream.selected and isinstance(stream, SigmaStream):
+                stream.write_deletion_markers()
+
+    @override
+    @classmethod
+    def cb_config(
+        cls,
+        ctx: click.Context,
+        param: click.Option,
+        value: tuple[str, ...],
+    ) -> Any:
+        """CLI callback to parse the config, keeping its sources for `--plan`.
+
+        Args:
+            ctx: Click context.
+            param: Click option.
+            value: Config file locations, or 'ENV' to use environment variables.
+        """
+        ctx.meta[CONFIG_SOURCES_KEY] = value
+        return super().cb_config(ctx, param, value)
+
+    @classmethod
+    def cb_plan(
+        cls,
+        ctx: click.Context,
+        param: click.Option,  # noqa: ARG003
+        value: bool,  # noqa: FBT001
+    ) -> None:
+        """CLI callback to estimate the API cost of a sync without running it.
+
+        Args:
+            ctx: Click context.
+            param: Click option.
+            value: Whether to run in plan mode.
+        """
+        if not value:
+            return
+
+        sources = ctx.meta.get(CONFIG_SOURCES_KEY, ())
+        config: dict[str, Any] = {}
+        for source in sources:
+            if source != "ENV":
+                config |= json.loads(Path(source).read_text(encoding="utf-8"))
+        catalog = ctx.params.get("catalog")
+        tap = cls(
+            config=config,
+            catalog=None if catalog is None else json.load(catalog),
+            parse_env_config="ENV" in sources,
+            validate_config=True,
+        )
+        sync_plan = SyncPlanner(tap).plan()
+        click.echo(json.dumps(sync_plan.to_dict(), indent=2))
+        ctx.exit()
+
+    @override
+    @classmethod
+    def get_singer_command(cls) -> click.Command:
+        """Add the `--plan` option to the standard CLI."""
+        command = super().get_singer_command()
+        command.params.append(
+            click.Option(
+                ["--plan"],
+                is_flag=True,
+                help=(
+                    "List parent streams and estimate the requests, pages and duration "
+                    "of a sync of the selected streams, without emitting any records."
+                ),
+                callback=cls.cb_plan,
+                expose_value=False,
+            ),
+        )
+        return command
+
 
 if __name__ == "__main__":
     TapSigma.cli()
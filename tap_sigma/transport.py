@@ -0,0 +1,133 @@
+"""HTTP transport settings shared by the sessions of an org."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, cast
+
+import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from tap_sigma.spool import spooled_body
+
+if sys.version_info >= (3, 12):
+    from typing import override
+else:
+    from typing_extensions import override
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+
+DEFAULT_POOL_MAXSIZE = DEFAULT_POOLSIZE
+
+#: Content encodings urllib3 can decode in this environment, e.g. `br` needs brotli
+SUPPORTED_ENCODINGS = tuple(ACCEPT_ENCODING.split(","))
+
+
+class TransportAdapter(HTTPAdapter):
+    """HTTP adapter applying the connect and read timeouts of the transport settings.
+
+    The timeout of each request is used for whichever of the two is not configured.
+    """
+
+    def __init__(
+        self,
+        *,
+        connect_timeout: float | None = None,
+        read_timeout: float | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the adapter.
+
+        Args:
+            connect_timeout: Seconds to wait for a connection to be established.
+            read_timeout: Seconds to wait between bytes of a response.
+            kwargs: Keyword arguments of `HTTPAdapter`.
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        super().__init__(**kwargs)
+
+    @override
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: float | tuple[float, float] | tuple[float, None] | None = None,
+        verify: bool | str = True,
+        cert: bytes | str | tuple[bytes | str, bytes | str] | None = None,
+        proxies: Mapping[str, str] | None = None,
+    ) -> requests.Response:
+        """Send a request with the configured timeouts."""
+        if not isinstance(timeout, tuple) and (self.connect_timeout or self.read_timeout):
+            # Either timeout may be None, i.e. unlimited, although the stubs disallow it
+            timeout = cast(
+                "tuple[float, float]",
+                (self.connect_timeout or timeout, self.read_timeout or timeout),
+            )
+        return super().send(request, stream, timeout, verify, cert, proxies)
+
+
+def accept_encoding(compression: Sequence[str] | None) -> str:
+    """Return the `Accept-Encoding` header offering the supported `compression` encodings."""
+    if compression is None:
+        return ACCEPT_ENCODING
+    encodings = [encoding for encoding in compression if encoding in SUPPORTED_ENCODINGS]
+    return ",".join(encodings) or "identity"
+
+
+def configure_session(
+    session: requests.Session,
+    transport: Mapping[str, Any],
+    *,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    max_retries: Any = 0,  # noqa: ANN401
+) -> requests.Session:
+    """Mount an adapter applying the `transport` settings to a session."""
+    adapter = TransportAdapter(
+        connect_timeout=transport.get("connect_timeout"),
+        read_timeout=transport.get("read_timeout"),
+        pool_maxsize=transport.get("pool_maxsize") or pool_maxsize,
+        max_retries=max_retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = accept_encoding(transport.get("compression"))
+    if not transport.get("keep_alive", True):
+        session.headers["Connection"] = "close"
+    return session
+
+
+_SESSIONS: dict[tuple[str, str], requests.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def get_session(
+    key: tuple[str, str],
+    transport: Mapping[str, Any],
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+) -> requests.Session:
+    """Return the session shared by every stream of an org.
+
+    Sharing the connection pool lets every stream reuse kept-alive TLS connections.
+    """
+    with _SESSIONS_LOCK:
+        if key not in _SESSIONS:
+            _SESSIONS[key] = configure_session(
+                requests.Session(),
+                transport,
+                pool_maxsize=pool_maxsize,
+            )
+        return _SESSIONS[key]
+
+
+def transferred_bytes(response: requests.Response) -> dict[str, int]:
+    """Return the bytes of a response body received on the wire and once decoded."""
+    if (body := spooled_body(response)) is not None:
+        return {"wire_bytes": body.wire_size, "body_bytes": body.size}
+    if not hasattr(response.raw, "tell"):
+        # E.g. a response replayed from a cassette
+        return {}
+    return {"wire_bytes": response.raw.tell(), "body_bytes": len(response.content)}
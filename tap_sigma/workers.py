@@ -0,0 +1,76 @@
+"""Process pool decoding and transforming response pages on every CPU core."""  # ruff: ignore[CPY001]
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, cast
+
+from singer_sdk.helpers.jsonpath import extract_jsonpath
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from singer_sdk.helpers.types import Context
+
+    from tap_sigma.client import SigmaStream
+    from tap_sigma.tap import TapSigma
+
+
+#: Tap instance of a worker process, used for the page transforms of its streams
+_WORKER_TAP: TapSigma | None = None
+
+_POOLS: dict[tuple[int, str | None], ProcessPoolExecutor] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _init_worker(config: dict[str, Any]) -> None:
+    from tap_sigma.tap import TapSigma  # noqa: PLC0415
+
+    global _WORKER_TAP  # noqa: PLW0603
+    _WORKER_TAP = TapSigma(config=config, validate_config=False, setup_mapper=False)
+
+
+def parse_page(
+    stream_name: str,
+    body: bytes,
+    deselected_properties: tuple[str, ...],
+    context: Context | None,
+) -> list[dict]:
+    """Decode a page and run the stream's page transform, in a worker process."""
+    assert _WORKER_TAP is not None, "parse_page only runs in the workers of a parse pool"  # noqa: S101
+    stream = cast("SigmaStream", _WORKER_TAP.streams[stream_name])
+    records = list(extract_jsonpath(stream.records_jsonpath, json.loads(body)))
+    for record in records:
+        for name in deselected_properties:
+            record.pop(name, None)
+    return stream.transform_page(records, context)
+
+
+def get_parse_pool(workers: int, config: Mapping[str, Any]) -> ProcessPoolExecutor:
+    """Return the process pool shared by every stream of an org.
+
+    Each org has its own pool, since the page transforms of its workers run with its
+    config. Workers are spawned rather than forked, since the locks held by the org,
+    page and hedging threads at fork time would never be released in the workers.
+    """
+    key = (workers, config.get("org_name"))
+    with _POOLS_LOCK:
+        if key not in _POOLS:
+            _POOLS[key] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(dict(config),),
+            )
+        return _POOLS[key]
+
+
+def shutdown_parse_pools() -> None:
+    """Stop the worker processes."""
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.shutdown(cancel_futures=True)
+        _POOLS.clear()
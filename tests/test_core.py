@@ -1,35 +1,117 @@
 """Tests for tap-sigma core functionality."""  # ruff: ignore[CPY001]
 
+import datetime as dt
+import gc
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import logging
 import os
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ClassVar, cast
+from urllib.parse import parse_qs, urlparse
 
+import pytest
 import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from singer_sdk.singerlib import RecordMessage, StateMessage
+from singer_sdk.singerlib.catalog import SelectionMask
+from singer_sdk.streams import RESTStream
 from singer_sdk.testing import SuiteConfig, get_tap_test_class
 
-from tap_sigma.client import SigmaPaginator
+from tap_sigma.auth import SigmaAuthenticator
+from tap_sigma.breaker import CircuitBreaker
+from tap_sigma.cassette import Cassette, CassetteError
+from tap_sigma.client import SigmaPaginator, SigmaStream
+from tap_sigma.hedging import RequestHedger
+from tap_sigma.planner import StreamPlan, SyncPlan, SyncPlanner
+from tap_sigma.progress import ProgressReporter, StreamProgress
+from tap_sigma.record_index import RecordIndex, record_hash, record_key
+from tap_sigma.snapshot import ParentSnapshot
+from tap_sigma.spool import MemoryBudget, spool_response, spooled_body
+from tap_sigma.state_store import StateStoreError
 from tap_sigma.tap import TapSigma
+from tap_sigma.workers import shutdown_parse_pools
+
+if TYPE_CHECKING:
+    from tap_sigma.streams.text_blobs import TextBlobsStream
+    from tap_sigma.streams.workbooks import WorkbookElementsStream
 
 CI = os.getenv("GITHUB_ACTIONS", "false") == "true"
 
+# Recorded responses the SDK tests are replayed from, e.g. in CI
+CASSETTE_PATH = Path(__file__).parent / "cassettes" / "sync.jsonl.gz"
+CASSETTE = os.getenv("TAP_SIGMA_CASSETTE") or (
+    str(CASSETTE_PATH) if CASSETTE_PATH.exists() else None
+)
+
 # Configuration for testing
 SAMPLE_CONFIG = {
     "api_url": "https://aws-api.sigmacomputing.com",
 }
 
+# Dummy credentials for offline unit tests
+CREDENTIALS = {
+    "client_id": "test-client-id",
+    "client_secret": "test-client-secret",
+}
+
+# A few parents per workspace and a page per context are enough for the SDK tests
+SDK_TEST_SAMPLE = {"per_workspace": 2, "max_pages": 1}
+
+SDK_TEST_CONFIG = (
+    {
+        **SAMPLE_CONFIG,
+        **CREDENTIALS,
+        "sample": SDK_TEST_SAMPLE,
+        "cassette_path": CASSETTE,
+        "cassette_mode": "replay",
+    }
+    if CASSETTE
+    else {**SAMPLE_CONFIG, "sample": SDK_TEST_SAMPLE}
+)
+RUN_SDK_TESTS = not CI or CASSETTE is not None
+
+
+def own_credentials(prefix: str) -> dict[str, str]:
+    """Return dummy credentials of their own, so no session or breaker is shared."""
+    return {"client_id": f"{prefix}-client-id", "client_secret": f"{prefix}-client-secret"}
+
+
+def sigma_stream(name: str, tap: TapSigma | None = None, /, **config: Any) -> SigmaStream:
+    """Return a stream of `tap`, or of an offline tap with the sample config and `config`."""
+    if tap is None:
+        tap = TapSigma(config={**SAMPLE_CONFIG, **CREDENTIALS, **config}, validate_config=False)
+    return cast("SigmaStream", tap.streams[name])
+
+
+@pytest.fixture
+def offline_auth(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Skip the OAuth token request in offline unit tests."""
+    monkeypatch.setattr(SigmaAuthenticator, "is_token_valid", lambda _: True)
+
 
 # Run standard tap tests from the SDK
 TestTapSigma = get_tap_test_class(
     tap_class=TapSigma,
-    config=SAMPLE_CONFIG,
+    config=SDK_TEST_CONFIG,
     suite_config=SuiteConfig(
         ignore_no_records_for_streams=[
             "data_model_tags",
             "tags",
+            "text_blobs",
             "translation_files",
         ],
     ),
-    include_tap_tests=not CI,
-    include_stream_tests=not CI,
-    include_stream_attribute_tests=not CI,
+    include_tap_tests=RUN_SDK_TESTS,
+    include_stream_tests=RUN_SDK_TESTS,
+    include_stream_attribute_tests=RUN_SDK_TESTS,
 )
 
 
@@ -50,3 +132,1098 @@ class TestSigmaPaginator:
         paginator.advance(response)
         assert paginator.current_value == 2  # noqa: PLR2004
         assert paginator.finished
+
+
+@pytest.mark.usefixtures("offline_auth")
+class TestTargetedSync:
+    """Test syncing only configured parent IDs."""
+
+    def test_fetches_configured_ids(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Configured workbook IDs are fetched from the detail endpoint."""
+        stream = sigma_stream("workbooks", workbook_ids=["wb-1", "wb-2"])
+        urls: list[str] = []
+
+        def fake_request(
+            prepared_request: requests.PreparedRequest,
+            context: dict | None,  # noqa: ARG001
+        ) -> requests.Response:
+            urls.append(str(prepared_request.url))
+            response = requests.Response()
+            workbook_id = str(prepared_request.url).rsplit("/", 1)[-1]
+            response._content = json.dumps({"workbookId": workbook_id}).encode()  # noqa: SLF001
+            return response
+
+        monkeypatch.setattr(stream, "_request", fake_request)
+
+        records = list(stream.get_records(None))
+        assert records == [{"workbookId": "wb-1"}, {"workbookId": "wb-2"}]
+        assert urls == [
+            "https://aws-api.sigmacomputing.com/v2/workbooks/wb-1",
+            "https://aws-api.sigmacomputing.com/v2/workbooks/wb-2",
+        ]
+
+    def test_missing_id_skipped(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """A configured ID which is not found does not stop the other IDs."""
+        stream = sigma_stream("workbooks", workbook_ids=["wb-1", "wb-2"])
+
+        def fake_request(
+            prepared_request: requests.PreparedRequest,
+            context: dict | None,  # noqa: ARG001
+        ) -> requests.Response:
+            response = requests.Response()
+            response.url = str(prepared_request.url)
+            workbook_id = response.url.rsplit("/", 1)[-1]
+            response.status_code = 404 if workbook_id == "wb-1" else 200
+            response._content = json.dumps({"workbookId": workbook_id}).encode()  # noqa: SLF001
+            stream.validate_response(response)
+            return response
+
+        monkeypatch.setattr(stream, "_request", fake_request)
+
+        assert list(stream.get_records(None)) == [{"workbookId": "wb-2"}]
+
+
+class TestParallelPages:
+    """Test fetching numbered pages concurrently."""
+
+    @pytest.mark.usefixtures("offline_auth")
+    def test_records_in_page_order(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Pages are requested in windows and their records yielded in order."""
+        stream = sigma_stream(
+            "members",
+            stream_options={"members": {"parallel_pages": 3, "page_size": 2}},
+        )
+        last_page = 5
+        pages: list[int] = []
+
+        def fake_request(
+            prepared_request: requests.PreparedRequest,
+            context: dict | None,  # noqa: ARG001
+        ) -> requests.Response:
+            page = int(parse_qs(urlparse(str(prepared_request.url)).query)["page"][0])
+            pages.append(page)
+            time.sleep(0.01 * max(last_page - page, 0))
+            entries = [{"memberId": f"m{page}-{i}"} for i in range(2)] if page <= last_page else []
+            response = requests.Response()
+            response._content = json.dumps(  # noqa: SLF001
+                {"entries": entries, "nextPage": page + 1 if page < last_page else None},
+            ).encode()
+            return response
+
+        monkeypatch.setattr(stream, "_request", fake_request)
+
+        records = list(stream.request_records(None))
+        assert [record["memberId"] for record in records] == [
+            f"m{page}-{i}" for page in range(1, last_page + 1) for i in range(2)
+        ]
+        assert sorted(pages) == list(range(1, 8))
+        assert stream.sync_costs["requests"] == len(pages)
+
+
+@pytest.mark.usefixtures("offline_auth")
+class TestPrefetch:
+    """Test requesting token-paginated pages in the background."""
+
+    def test_next_page_requested_ahead(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """The next page is requested while the current one is processed."""
+        stream = sigma_stream(
+            "workbook_queries",
+            stream_options={"workbook_queries": {"prefetch_pages": 1}},
+        )
+        tokens: list[str | None] = []
+
+        def fake_request(
+            prepared_request: requests.PreparedRequest,
+            context: dict | None,  # noqa: ARG001
+        ) -> requests.Response:
+            token = parse_qs(urlparse(str(prepared_request.url)).query).get("page", [None])[0]
+            tokens.append(token)
+            page = int(token or 1)
+            response = requests.Response()
+            response._content = json.dumps(  # noqa: SLF001
+                {
+                    "entries": [{"elementId": f"e{page}"}],
+                    "nextPage": str(page + 1) if page < 3 else None,  # noqa: PLR2004
+                },
+            ).encode()
+            return response
+
+        monkeypatch.setattr(stream, "_request", fake_request)
+
+        records = iter(stream.request_records({"workbookId": "wb-1"}))
+        assert next(records) == {"elementId": "e1"}
+        deadline = time.monotonic() + 1
+        while len(tokens) < 2 and time.monotonic() < deadline:  # noqa: PLR2004
+            time.sleep(0.01)
+        assert tokens == [None, "2"]
+
+        assert list(records) == [{"elementId": "e2"}, {"elementId": "e3"}]
+        assert tokens == [None, "2", "3"]
+        assert stream.sync_costs["requests"] == 3  # noqa: PLR2004
+
+
+class TestPageTransform:
+    """Test transforming the records of a page at once."""
+
+    def test_data_model_sources(self) -> None:
+        """Source IDs are copied by type and unknown types are dropped."""
+        stream = sigma_stream("data_model_sources")
+        response = requests.Response()
+        response._content = json.dumps(  # noqa: SLF001
+            {
+                "entries": [
+                    {"type": "table", "tableId": "t-1"},
+                    {"type": "unknown"},
+                    {"type": "custom-sql", "customSqlId": "sql-1"},
+                ],
+            },
+        ).encode()
+
+        assert list(stream.parse_response(response)) == [
+            {"type": "table", "tableId": "t-1", "sourceTableId": "t-1", "_sdc_source_id": "t-1"},
+            {
+                "type": "custom-sql",
+                "customSqlId": "sql-1",
+                "sourceCustomSqlId": "sql-1",
+                "_sdc_source_id": "sql-1",
+            },
+        ]
+
+    def test_parse_workers(self) -> None:
+        """Pages fetched ahead are decoded in the background and transformed as usual."""
+        stream = sigma_stream(
+            "data_model_sources",
+            parse_workers=2,
+            stream_options={"data_model_sources": {"prefetch_pages": 1}},
+        )
+        sequential = sigma_stream("data_models", stream.tap)
+        request = requests.Request("GET", stream.get_url({"_sdc_data_model_id": "dm-1"})).prepare()
+        response = requests.Response()
+        response._content = json.dumps(  # noqa: SLF001
+            {"entries": [{"type": "table", "tableId": "t-1"}, {"type": "unknown"}]},
+        ).encode()
+
+        try:
+            # Sequential pages would only wait for their worker
+            sequential_request = requests.Request("GET", sequential.get_url(None)).prepare()
+            sequential.submit_page(sequential_request, response, None)
+            assert not sequential._parsed_pages  # noqa: SLF001
+
+            stream.submit_page(request, response, {"_sdc_data_model_id": "dm-1"})
+            (future,) = stream._parsed_pages.values()  # noqa: SLF001
+            # The page is decoded while the main thread is free to process earlier pages
+            future.exception(timeout=60)
+            assert list(stream.parse_response(response)) == [
+                {
+                    "type": "table",
+                    "tableId": "t-1",
+                    "sourceTableId": "t-1",
+                    "_sdc_source_id": "t-1",
+                },
+            ]
+        finally:
+            shutdown_parse_pools()
+
+
+class TestWorkbookElementsStrategy:
+    """Test joining workbook elements from the page crawl."""
+
+    PAGES: ClassVar[dict[str, list[dict]]] = {
+        "p1": [{"elementId": "e1", "name": "Chart"}, {"elementId": "e2", "name": "Table"}],
+        "p2": [{"elementId": "e2", "name": "Table"}],
+    }
+
+    def test_single_crawl(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Elements are joined from the page elements, and each endpoint is requested once."""
+        requested = []
+
+        def request_records(stream: RESTStream, context: dict) -> list[dict]:
+            requested.append(stream.get_url(context).removeprefix(stream.url_base))
+            if stream.name == "workbook_pages":
+                return [{"pageId": page_id} for page_id in self.PAGES]
+            return [dict(record) for record in self.PAGES[context["pageId"]]]
+
+        monkeypatch.setattr(SigmaStream, "request_records", request_records)
+        stream = cast(
+            "WorkbookElementsStream",
+            sigma_stream("workbook_elements", workbook_elements_strategy="pages"),
+        )
+        context = {"workbookId": "wb-1"}
+
+        elements = list(stream.request_records(context))
+        assert [element["elementId"] for element in elements] == ["e1", "e2"]
+        assert list(sigma_stream("workbook_pages", stream.tap).request_records(context)) == [
+            {"pageId": "p1"},
+            {"pageId": "p2"},
+        ]
+        page_elements = sigma_stream("workbook_page_elements", stream.tap)
+        assert len(list(page_elements.request_records({**context, "pageId": "p1"}))) == 2  # noqa: PLR2004
+        assert requested == [
+            "/v2/workbooks/wb-1/pages",
+            "/v2/workbooks/wb-1/pages/p1/elements",
+            "/v2/workbooks/wb-1/pages/p2/elements",
+        ]
+
+    def test_crawl_dropped(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Crawled records which no page stream took are dropped with their workbook."""
+        monkeypatch.setattr(SigmaStream, "request_records", lambda *_: [{"pageId": "p1"}])
+        monkeypatch.setattr(RESTStream, "_sync_children", lambda *_: None)
+        stream = cast(
+            "WorkbookElementsStream",
+            sigma_stream("workbook_elements", workbook_elements_strategy="pages"),
+        )
+        context = {"workbookId": "wb-1"}
+        list(stream.crawl_pages(context))
+
+        sigma_stream("workbooks", stream.tap)._sync_children(context)  # noqa: SLF001
+        assert stream.pop_crawled("workbook_pages", context) is None
+
+
+class TestTransport:
+    """Test the HTTP transport settings."""
+
+    def test_session(self) -> None:
+        """Streams of an org share a session sized to the configured concurrency."""
+        stream = sigma_stream(
+            "workbook_columns",
+            **own_credentials("transport"),
+            transport={"compression": ["gzip", "lz4"], "connect_timeout": 5},
+            stream_options={"workbook_columns": {"parallel_pages": 8, "hedge_requests": True}},
+        )
+        session = stream.requests_session
+        assert session is sigma_stream("workbooks", stream.tap).requests_session
+        assert session.headers["Accept-Encoding"] == "gzip"
+
+        adapter = session.get_adapter(SAMPLE_CONFIG["api_url"])
+        assert adapter.connect_timeout == 5  # noqa: PLR2004
+        assert adapter._pool_maxsize == 19  # noqa: PLR2004, SLF001
+
+    def test_transferred_bytes(self) -> None:
+        """Compressed and decoded bytes of a response are counted in the sync costs."""
+        body = json.dumps({"entries": [{"columnId": "c1", "name": "x" * 1000}]}).encode()
+        raw = urllib3.HTTPResponse(
+            body=io.BytesIO(gzip.compress(body)),
+            headers={"Content-Encoding": "gzip"},
+            status=200,
+            preload_content=False,
+        )
+        response = HTTPAdapter().build_response(requests.Request("GET", "https://x").prepare(), raw)
+        assert response.content == body
+
+        costs = sigma_stream("workbook_columns").calculate_sync_cost(
+            response.request,
+            response,
+            None,
+        )
+        assert costs["body_bytes"] == len(body)
+        assert costs["wire_bytes"] == len(gzip.compress(body))
+
+
+class TestSpooledResponses:
+    """Test parsing large responses from disk."""
+
+    def test_large_body_spooled(self) -> None:
+        """Bodies over the memory threshold are parsed incrementally from disk."""
+        stream = sigma_stream("members")
+        entries = [{"memberId": f"m{i}", "email": "x" * 100} for i in range(50)]
+        response = requests.Response()
+        response.raw = io.BytesIO(json.dumps({"entries": entries, "nextPage": 2}).encode())
+
+        spooled = spool_response(response, max_memory=1024, slots=threading.BoundedSemaphore())
+        assert spooled_body(spooled) is not None
+        assert list(stream.parse_response(spooled)) == entries
+        assert SigmaPaginator().get_next(spooled) == 2  # noqa: PLR2004
+
+    def test_entries_skipped(self) -> None:
+        """The next page is found without decoding entries, and kept once they are decoded."""
+        entries = [{"memberId": f"m{i}", "name": 'a "[{" \\ ]} b' * 5} for i in range(2000)]
+        body = json.dumps({"entries": entries, "nextPage": "token"}).encode()
+
+        response = requests.Response()
+        response.raw = io.BytesIO(body)
+        spooled = spooled_body(
+            spool_response(response, max_memory=1024, slots=threading.BoundedSemaphore()),
+        )
+        assert spooled is not None
+        assert spooled.get("nextPage") == "token"
+
+        response = requests.Response()
+        response.raw = io.BytesIO(body)
+        spooled = spooled_body(
+            spool_response(response, max_memory=1024, slots=threading.BoundedSemaphore()),
+        )
+        assert spooled is not None
+        assert list(spooled.iter_items("entries")) == entries
+        assert spooled._members == {"nextPage": "token"}  # noqa: SLF001
+
+    def test_memory_budget(self) -> None:
+        """Bodies are spooled once the budget is used up, until responses are released."""
+        budget = MemoryBudget(1500)
+        responses = []
+        for _ in range(2):
+            response = requests.Response()
+            response.raw = io.BytesIO(b"x" * 1000)
+            responses.append(
+                spool_response(
+                    response,
+                    max_memory=1024,
+                    slots=threading.BoundedSemaphore(),
+                    budget=budget,
+                ),
+            )
+        assert [spooled_body(response) is None for response in responses] == [True, False]
+        assert budget.used == 1000  # noqa: PLR2004
+
+        responses.clear()
+        gc.collect()
+        assert budget.used == 0
+
+    def test_small_body_in_memory(self) -> None:
+        """Bodies under the memory threshold are loaded as usual."""
+        response = requests.Response()
+        response.raw = io.BytesIO(b'{"entries": [], "nextPage": null}')
+
+        response = spool_response(response, max_memory=1024, slots=threading.BoundedSemaphore())
+        assert spooled_body(response) is None
+        assert response.json() == {"entries": [], "nextPage": None}
+
+
+@pytest.mark.usefixtures("offline_auth")
+class TestCassette:
+    """Test recording and replaying API responses."""
+
+    def test_record_and_replay(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Recorded responses are replayed offline, without credentials."""
+        path = tmp_path / "sync.jsonl.gz"
+        stream = sigma_stream("teams", cassette_path=str(path), cassette_mode="record")
+        recording = stream.tap
+
+        def fake_send(
+            request: requests.PreparedRequest,
+            **kwargs: object,  # noqa: ARG001
+        ) -> requests.Response:
+            assert request.headers is not None
+            assert request.headers["Authorization"]
+            response = requests.Response()
+            response.status_code = 200
+            response._content = json.dumps(  # noqa: SLF001
+                {"entries": [{"teamId": "t-1"}], "nextPage": None},
+            ).encode()
+            return response
+
+        monkeypatch.setattr(stream.requests_session, "send", fake_send)
+        records = list(stream.request_records(None))
+        assert recording.cassette is not None
+        recording.cassette.close()
+
+        replaying = sigma_stream("teams", cassette_path=str(path))
+        assert list(replaying.request_records(None)) == records
+        with gzip.open(path, "rt") as cassette:
+            content = cassette.read()
+        assert "/v2/teams?page=1" in content
+        assert CREDENTIALS["client_secret"] not in content
+
+    def test_spooled_body_recorded(self, tmp_path: Path) -> None:
+        """Spooled bodies are copied to the cassette without being loaded in memory."""
+        path = tmp_path / "sync.jsonl.gz"
+        cassette = Cassette(path, "record")
+        body = json.dumps({"entries": [{"name": 'é "x"' * 20_000}], "nextPage": None})
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(body.encode())
+        response = spool_response(response, max_memory=1024, slots=threading.BoundedSemaphore())
+        request = requests.Request("GET", "https://example.com/v2/teams").prepare()
+        cassette.record(request, response)
+        cassette.close()
+        assert response._content is False  # noqa: SLF001
+
+        replayed = Cassette(path, "replay").replay(request)
+        assert replayed.text == body
+
+
+class TestParentSnapshot:
+    """Test reusing parent records across tap invocations."""
+
+    def test_snapshot_reused(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """A second job builds child contexts from the first job's snapshot."""
+        config = {**SAMPLE_CONFIG, **CREDENTIALS, "parent_snapshot_dir": str(tmp_path)}
+        catalog = TapSigma(config=config, validate_config=False).catalog
+        for stream_id in ("workbooks", "workbook_pages"):
+            catalog[stream_id].metadata.root.selected = stream_id == "workbook_pages"
+        listed = [
+            {"workbookId": "wb-1", "name": "Sales", "isArchived": False, "updatedAt": "2024-01-02"},
+        ]
+        calls: list[int] = []
+
+        def fake_get_records(self: object, context: dict | None) -> list[dict]:  # noqa: ARG001
+            calls.append(1)
+            return [dict(record) for record in listed]
+
+        monkeypatch.setattr(RESTStream, "get_records", fake_get_records)
+        for _ in range(2):
+            tap = TapSigma(config=config, catalog=catalog.to_dict(), validate_config=False)
+            records = list(sigma_stream("workbooks", tap).get_records(None))
+
+        assert len(calls) == 1
+        assert records == [{"workbookId": "wb-1", "isArchived": False, "updatedAt": "2024-01-02"}]
+        assert ParentSnapshot(next(tmp_path.glob("workbooks-*.json")), ttl=0).read() is None
+
+
+class TestBatchOptIn:
+    """Test per-stream BATCH message opt-in."""
+
+    BATCH_CONFIG: ClassVar[dict] = {
+        "encoding": {"format": "jsonl", "compression": "gzip"},
+        "storage": {"root": "file:///tmp/tap-sigma"},
+    }
+
+    def test_all_streams_batched_by_default(self) -> None:
+        """Every stream is batched when no stream opts in."""
+        tap = TapSigma(
+            config={**SAMPLE_CONFIG, **CREDENTIALS, "batch_config": self.BATCH_CONFIG},
+            validate_config=False,
+        )
+        for stream in tap.streams.values():
+            assert stream.get_batch_config(stream.config) is not None
+
+    def test_only_opted_in_streams_batched(self) -> None:
+        """Only streams with the `batch` option are batched once any stream opts in."""
+        tap = TapSigma(
+            config={
+                **SAMPLE_CONFIG,
+                **CREDENTIALS,
+                "batch_config": self.BATCH_CONFIG,
+                "stream_options": {"workbook_columns": {"batch": True}},
+            },
+            validate_config=False,
+        )
+        columns = tap.streams["workbook_columns"]
+        workbooks = tap.streams["workbooks"]
+        assert columns.get_batch_config(columns.config) is not None
+        assert workbooks.get_batch_config(workbooks.config) is None
+
+
+class TestSelectionPushDown:
+    """Test dropping deselected properties on extraction."""
+
+    def test_deselected_properties_dropped(self) -> None:
+        """Deselected properties are dropped, primary keys are always kept."""
+        stream = sigma_stream("workbook_queries")
+        stream._mask = SelectionMask(  # noqa: SLF001
+            {
+                (): True,
+                ("properties", "sql"): False,
+                ("properties", "elementId"): False,
+            },
+        )
+        response = requests.Response()
+        response._content = json.dumps(  # noqa: SLF001
+            {"entries": [{"elementId": "e1", "name": "Q", "sql": "select 1"}]},
+        ).encode()
+
+        assert list(stream.parse_response(response)) == [{"elementId": "e1", "name": "Q"}]
+
+    def test_sample_group_kept(self) -> None:
+        """The property grouping sampled parents is kept, even if deselected."""
+        stream = sigma_stream("workbooks", sample={"per_workspace": 1})
+        stream._mask = SelectionMask({(): True, ("properties", "path"): False})  # noqa: SLF001
+        assert "path" not in stream.deselected_properties
+
+
+class TestSyncPlan:
+    """Test the sync cost estimates."""
+
+    def test_estimates(self) -> None:
+        """Sampled requests are extrapolated to every context, bounded by the rate limit."""
+        plan = StreamPlan(
+            stream="workbook_columns",
+            parent="workbooks",
+            page_size=1000,
+            contexts=100,
+            sampled_contexts=5,
+            sampled_requests=10,
+            sampled_records=50,
+            sampled_seconds=1.0,
+        )
+        assert plan.expected_requests == 200  # noqa: PLR2004
+        assert plan.expected_records == 1000  # noqa: PLR2004
+        assert SyncPlan(streams=[plan]).eta_seconds == pytest.approx(20.0)
+        assert SyncPlan(streams=[plan], requests_per_second=2).eta_seconds == pytest.approx(100.0)
+
+        # Orgs are synced concurrently, and numbered pages `concurrency` at a time
+        other_org = replace(plan, org="eu", concurrency=4)
+        assert SyncPlan(streams=[plan, other_org]).eta_seconds == pytest.approx(20.0)
+        assert other_org.eta_seconds() == pytest.approx(5.0)
+
+    @pytest.mark.usefixtures("offline_auth")
+    def test_plan(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Leaf listings are planned from their first page, parents fanned out as a sync."""
+        config = {**SAMPLE_CONFIG, **CREDENTIALS, "max_runtime": 60}
+        catalog = TapSigma(config=config, validate_config=False).catalog
+        for entry in catalog.streams:
+            entry.metadata.root.selected = entry.tap_stream_id in {"files", "workbook_columns"}
+        tap = TapSigma(config=config, catalog=catalog.to_dict(), validate_config=False)
+        bodies = {
+            "/v2/files": {"entries": [{"id": "f-1"}], "total": 2500, "nextPage": "2"},
+            "/v2/workbooks": {
+                "entries": [
+                    {"workbookId": "wb-1", "updatedAt": "2024-01-01"},
+                    {"workbookId": "wb-2", "updatedAt": "2024-01-01", "isArchived": True},
+                ],
+                "nextPage": None,
+            },
+            "/v2/workbooks/wb-1/columns": {"entries": [{"columnId": "c1"}], "nextPage": None},
+        }
+        paths: list[str] = []
+
+        def fake_request(
+            stream: SigmaStream,  # noqa: ARG001
+            prepared_request: requests.PreparedRequest,
+            context: dict | None,  # noqa: ARG001
+        ) -> requests.Response:
+            path = urlparse(str(prepared_request.url)).path
+            paths.append(path)
+            response = requests.Response()
+            response._content = json.dumps(bodies[path]).encode()  # noqa: SLF001
+            response.elapsed = dt.timedelta(seconds=0.1)
+            return response
+
+        monkeypatch.setattr(SigmaStream, "_request", fake_request)
+
+        plans = {plan.stream: plan for plan in SyncPlanner(tap).plan().streams}
+        assert sorted(paths) == sorted(bodies)
+        assert plans["files"].expected_requests == 3  # noqa: PLR2004
+        assert plans["files"].expected_records == 2500  # noqa: PLR2004
+        assert plans["workbooks"].expected_records == 2  # noqa: PLR2004
+        assert plans["workbook_columns"].contexts == 1
+        assert not sigma_stream("workbooks", tap).stream_state.get("completed_parents")
+
+
+class TestRecordIndex:
+    """Test change detection with the record hash index."""
+
+    def test_unchanged_records_skipped(self, tmp_path: Path) -> None:
+        """Only new or changed records are reported after a committed run."""
+        index = RecordIndex(tmp_path / "index.db")
+        first = {"workbookId": "wb-1", "name": "Sales"}
+        key = record_key(first, ["workbookId"])
+        assert index.has_changed("workbooks", key, record_hash(first))
+        index.commit()
+        index.close()
+
+        index = RecordIndex(tmp_path / "index.db")
+        assert not index.has_changed("workbooks", key, record_hash(first))
+        changed = {**first, "name": "Revenue"}
+        assert index.has_changed("workbooks", key, record_hash(changed))
+
+    def test_deleted_keys(self, tmp_path: Path) -> None:
+        """Keys not seen during a run are deleted, unless their context was skipped."""
+        index = RecordIndex(tmp_path / "index.db")
+        for workbook_id in ("wb-1", "wb-2", "wb-3"):
+            record = {"workbookId": workbook_id, "elementId": "e1"}
+            key = record_key(record, ["workbookId", "elementId"])
+            index.has_changed("workbook_elements", key, record_hash(record), record)
+        index.commit()
+        index.close()
+
+        index = RecordIndex(tmp_path / "index.db")
+        record = {"workbookId": "wb-1", "elementId": "e1"}
+        key = record_key(record, ["workbookId", "elementId"])
+        index.has_changed("workbook_elements", key, record_hash(record), record)
+        index.keep_context("workbook_elements", {"elementId": "e1", "workbookId": "wb-2"})
+
+        deleted = [key for keys in index.pop_deleted("workbook_elements") for key in keys]
+        assert deleted == ['["wb-3", "e1"]']
+
+    @pytest.mark.usefixtures("offline_auth")
+    def test_deletions_before_final_state(
+        self,
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Deletion markers are emitted before the final STATE message of the sync."""
+        config = {
+            **SAMPLE_CONFIG,
+            **CREDENTIALS,
+            "detect_deletes": True,
+            "record_index_path": str(tmp_path / "index.db"),
+        }
+        catalog = TapSigma(config=config, validate_config=False).catalog
+        for entry in catalog.values():
+            entry.metadata.root.selected = entry.tap_stream_id == "members"
+
+        for member_ids in (["m-1", "m-2"], ["m-1"]):
+            records = [{"memberId": member_id} for member_id in member_ids]
+            monkeypatch.setattr(RESTStream, "get_records", lambda *_, r=records: iter(r))
+            tap = TapSigma(config=config, catalog=catalog.to_dict(), validate_config=False)
+            tap.sync_all()
+
+        messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        types = [message["type"] for message in messages]
+        (deletion,) = [
+            i
+            for i, message in enumerate(messages)
+            if "_sdc_deleted_at" in message.get("record", {})
+        ]
+        assert messages[deletion]["record"]["memberId"] == "m-2"
+        assert deletion < len(types) - 1 - types[::-1].index("STATE")
+
+
+class TestTimeBudget:
+    """Test prioritized parent contexts under `max_runtime`."""
+
+    def test_prioritize(self) -> None:
+        """Priority IDs come first, then the most recently updated parents."""
+        stream = sigma_stream("workbooks", max_runtime=60, priority_ids=["wb-3"])
+        records = [
+            {"workbookId": "wb-1", "updatedAt": "2024-01-01T00:00:00Z"},
+            {"workbookId": "wb-2", "updatedAt": "2024-03-01T00:00:00Z"},
+            {"workbookId": "wb-3", "updatedAt": "2023-01-01T00:00:00Z"},
+        ]
+        ordered = [record["workbookId"] for record in stream.prioritize(records)]
+        assert ordered == ["wb-3", "wb-2", "wb-1"]
+
+    def test_out_of_time(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Once the budget is spent, the remaining parents and streams are left to the next run.
+
+        The next run syncs the deferred streams first.
+        """
+        stream = sigma_stream("workbooks", max_runtime=60)
+        tap = stream.tap
+        records = [
+            {"workbookId": "wb-1", "updatedAt": "2024-01-01T00:00:00Z"},
+            {"workbookId": "wb-2", "updatedAt": "2024-03-01T00:00:00Z"},
+        ]
+        synced: list[str] = []
+        monkeypatch.setattr(stream, "_get_records", lambda _: iter(records))
+        monkeypatch.setattr(
+            RESTStream,
+            "_sync_children",
+            lambda _, context: synced.append(context["workbookId"]),
+        )
+        monkeypatch.setattr(TapSigma, "out_of_time", property(lambda _: bool(synced)))
+
+        stream.sync()
+        assert synced == ["wb-2"]
+        assert tap.sync_incomplete
+        assert stream.stream_state["completed_parents"] == {"wb-2": "2024-03-01T00:00:00Z"}
+
+        assert tap.deferred_contexts == 1
+
+        members = sigma_stream("members", tap)
+        members.sync()
+        assert not members.sync_costs
+
+        next_tap = TapSigma(config=dict(tap.config), state=dict(tap.state), validate_config=False)
+        assert list(next_tap.streams)[:2] == ["members", "workbooks"]
+
+
+class TestSampling:
+    """Test sampled dev and QA runs."""
+
+    def test_per_workspace(self) -> None:
+        """Only the children of the first parents of each workspace are synced."""
+        stream = sigma_stream("workbooks", sample={"per_workspace": 1})
+        records = [
+            {"workbookId": "wb-1", "path": "Finance/Reports"},
+            {"workbookId": "wb-2", "path": "Finance"},
+            {"workbookId": "wb-3", "path": "Sales/Forecasts"},
+        ]
+        contexts = [
+            context
+            for record in records
+            for context in stream.generate_child_contexts(record, None)
+        ]
+        assert contexts == [{"workbookId": "wb-1"}, {"workbookId": "wb-3"}]
+        assert stream.tap.sync_incomplete
+
+    def test_percent(self) -> None:
+        """Parents are sampled deterministically by the hash of their ID."""
+        stream = sigma_stream("members", sample={"percent": 25})
+        records = [{"memberId": f"m-{i}"} for i in range(1000)]
+        sampled = [record["memberId"] for record in records if stream.is_sampled(record)]
+        assert 200 < len(sampled) < 300  # noqa: PLR2004
+        assert sampled == [record["memberId"] for record in records if stream.is_sampled(record)]
+
+    def test_max_pages(self) -> None:
+        """Pagination stops after `max_pages` pages."""
+        paginator = SigmaPaginator(max_pages=2)
+        response = requests.Response()
+        response._content = b'{"nextPage": 2}'  # noqa: SLF001
+        paginator.advance(response)
+        assert not paginator.finished
+        response._content = b'{"nextPage": 3}'  # noqa: SLF001
+        paginator.advance(response)
+        assert paginator.finished
+
+    def test_incomplete(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Sampled listings never report deletions, nor save snapshots, costs or progress."""
+        config = {
+            **SAMPLE_CONFIG,
+            **CREDENTIALS,
+            "sample": {"max_pages": 1},
+            "detect_deletes": True,
+            "record_index_path": str(tmp_path / "index.db"),
+            "parent_snapshot_dir": str(tmp_path),
+            "schedule_by_cost": True,
+            "max_runtime": 60,
+        }
+        catalog = TapSigma(config=config, validate_config=False).catalog
+        catalog["workbooks"].metadata.root.selected = False
+        tap = TapSigma(config=config, catalog=catalog.to_dict(), validate_config=False)
+        records = [{"workbookId": "wb-1", "updatedAt": "2024-01-01T00:00:00Z"}]
+        monkeypatch.setattr(RESTStream, "get_records", lambda *_: iter(records))
+        monkeypatch.setattr(RESTStream, "_sync_children", lambda *_: None)
+        deletions: list[str] = []
+        monkeypatch.setattr(
+            SigmaStream,
+            "write_deletion_markers",
+            lambda stream: deletions.append(stream.name),
+        )
+
+        stream = sigma_stream("workbooks", tap)
+        stream.sync()
+        tap.write_deletion_markers()
+        assert tap.sync_incomplete
+        assert not deletions
+        assert not list(tmp_path.glob("workbooks-*.json"))
+        assert "parent_costs" not in stream.stream_state
+        assert not stream.stream_state.get("completed_parents")
+
+
+class TestCostScheduling:
+    """Test ordering parents by the learned cost of their children."""
+
+    RECORDS: ClassVar[list[dict]] = [{"workbookId": f"wb-{i}"} for i in range(1, 5)]
+
+    def test_longest_first(self) -> None:
+        """Parents with the slowest children come first, unknown parents in list order."""
+        stream = sigma_stream("workbooks", schedule_by_cost=True)
+        assert stream.schedule(self.RECORDS) == self.RECORDS
+
+        stream.stream_state["parent_costs"] = {
+            "wb-2": {"seconds": 30.0, "records": 5000},
+            "wb-3": {"seconds": 2.0, "records": 10},
+        }
+        ordered = [record["workbookId"] for record in stream.schedule(self.RECORDS)]
+        assert ordered == ["wb-2", "wb-3", "wb-1", "wb-4"]
+
+    def test_costs_learned(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """The records read by the children of each parent are saved in the state."""
+        stream = sigma_stream("workbooks", schedule_by_cost=True)
+        columns = sigma_stream("workbook_columns", stream.tap)
+
+        def sync_children(_: object, context: dict) -> None:
+            columns._records_read += int(context["workbookId"][-1])  # noqa: SLF001
+
+        monkeypatch.setattr(RESTStream, "_sync_children", sync_children)
+        stream._new_parent_costs = {}  # noqa: SLF001
+        for record in self.RECORDS[:2]:
+            for context in stream.generate_child_contexts(record, None):
+                stream._sync_children(context)  # noqa: SLF001
+        stream._save_parent_costs()  # noqa: SLF001
+
+        costs = stream.stream_state["parent_costs"]
+        assert {key: cost["records"] for key, cost in costs.items()} == {"wb-1": 1, "wb-2": 2}
+
+    def test_unmeasured_costs_kept(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Parents listed but not synced keep their costs, parents gone lose them."""
+        stream = sigma_stream("workbooks", schedule_by_cost=True, max_runtime=60)
+        stream.stream_state["parent_costs"] = {
+            "wb-2": {"seconds": 30.0, "records": 5000},
+            "wb-9": {"seconds": 1.0, "records": 1},
+        }
+        synced: list[dict] = []
+        monkeypatch.setattr(RESTStream, "_sync_children", lambda _, context: synced.append(context))
+        # The budget runs out after the first parent
+        monkeypatch.setattr(TapSigma, "out_of_time", property(lambda _: bool(synced)))
+        stream._new_parent_costs = {}  # noqa: SLF001
+        for record in self.RECORDS[:2]:
+            for context in stream.generate_child_contexts(record, None):
+                stream._sync_children(context)  # noqa: SLF001
+        stream._save_parent_costs()  # noqa: SLF001
+
+        costs = stream.stream_state["parent_costs"]
+        assert sorted(costs) == ["wb-1", "wb-2"]
+        assert costs["wb-2"]["seconds"] == 30.0  # noqa: PLR2004
+
+
+class TestRequestHedger:
+    """Test hedged requests."""
+
+    def test_slow_request_hedged(self) -> None:
+        """A request slower than the p95 latency is duplicated and the fastest wins."""
+        hedger = RequestHedger(budget=1.0)
+        for _ in range(20):
+            hedger.latencies.add(0.01)
+
+        calls = itertools.count()
+        bodies: list[io.BytesIO] = []
+
+        def send() -> requests.Response:
+            response = requests.Response()
+            response.raw = body = io.BytesIO()
+            bodies.append(body)
+            if next(calls) == 0:
+                time.sleep(0.5)
+                response.status_code = 500
+            else:
+                response.status_code = 200
+            return response
+
+        assert hedger.send(send).status_code == 200  # noqa: PLR2004
+        assert hedger.hedged == 1
+
+        # The slow primary request is closed once it completes
+        hedger.close()
+        assert [body.closed for body in bodies] == [True, False]
+
+    def test_ok_response_preferred(self) -> None:
+        """An error response arriving first is only used if the duplicate fails too."""
+        hedger = RequestHedger(budget=1.0)
+        for _ in range(20):
+            hedger.latencies.add(0.01)
+
+        calls = itertools.count()
+
+        def send() -> requests.Response:
+            response = requests.Response()
+            if next(calls) == 0:
+                time.sleep(0.05)
+                response.status_code = 503
+            else:
+                time.sleep(0.2)
+                response.status_code = 200
+            return response
+
+        assert hedger.send(send).status_code == 200  # noqa: PLR2004
+        hedger.close()
+
+
+class TestCircuitBreaker:
+    """Test skipping the contexts of a failing endpoint."""
+
+    def test_trip_and_recover(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """The circuit opens at the error rate and closes after a successful probe."""
+        now = 1000.0
+        monkeypatch.setattr(time, "monotonic", lambda: now)
+        breaker = CircuitBreaker(error_rate=0.5, window=4, probe_interval=60)
+        for success in (True, False, True, False):
+            assert breaker.allow()
+            breaker.record(success=success)
+        assert breaker.is_open
+        assert not breaker.allow()
+
+        now += 60
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record(success=True)
+        assert not breaker.is_open
+
+    @pytest.mark.usefixtures("offline_auth")
+    def test_contexts_deferred(self) -> None:
+        """Contexts of an endpoint with an open circuit are deferred to the next run."""
+        stream = sigma_stream(
+            "workbook_queries",
+            **own_credentials("breaker"),
+            circuit_breaker_error_rate=0.5,
+            circuit_breaker_window=2,
+        )
+        tap = stream.tap
+        breaker = stream.circuit_breaker
+        assert breaker is not None
+        breaker.record(success=False)
+        breaker.record(success=False)
+
+        assert list(stream.request_records({"workbookId": "wb-1"})) == []
+        assert tap.deferred_contexts == 1
+        assert tap.sync_incomplete
+        columns_breaker = sigma_stream("workbook_columns", tap).circuit_breaker
+        assert columns_breaker is not None
+        assert not columns_breaker.is_open
+        assert sigma_stream("workbooks", tap).circuit_breaker is None
+
+    @pytest.mark.usefixtures("offline_auth")
+    def test_failed_probe(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """A probe failing with any error lets the next probe through."""
+        stream = sigma_stream(
+            "workbook_queries",
+            **own_credentials("probe"),
+            circuit_breaker_error_rate=0.5,
+            circuit_breaker_window=2,
+        )
+        breaker = stream.circuit_breaker
+        assert breaker is not None
+        breaker.record(success=False)
+        breaker.record(success=False)
+
+        def send(_: requests.PreparedRequest) -> requests.Response:
+            msg = "No recorded response"
+            raise CassetteError(msg)
+
+        now = time.monotonic() + breaker.probe_interval
+        monkeypatch.setattr(time, "monotonic", lambda: now)
+        monkeypatch.setattr(stream, "_send", send)
+        request = requests.Request("GET", stream.get_url({"workbookId": "wb-1"})).prepare()
+        with pytest.raises(CassetteError):
+            stream._request(request, None)  # noqa: SLF001
+
+        now += breaker.probe_interval
+        assert breaker.allow()
+
+
+class TestTextDeduplication:
+    """Test moving large text properties to the `text_blobs` stream."""
+
+    def test_bodies_emitted_once(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Each distinct body is emitted once and records hold its hash."""
+        stream = sigma_stream(
+            "workbook_queries",
+            stream_options={"workbook_queries": {"deduplicate_properties": ["sql"]}},
+        )
+        messages: list = []
+        monkeypatch.setattr(stream.tap, "write_message", messages.append)
+
+        first = stream.deduplicate_text({"elementId": "e1", "sql": "select 1"})
+        second = stream.deduplicate_text({"elementId": "e2", "sql": "select 1"})
+
+        assert first["sql"] == second["sql"] == hashlib.sha256(b"select 1").hexdigest()
+        records = [message for message in messages if isinstance(message, RecordMessage)]
+        assert [message.record for message in records] == [
+            {"hash": first["sql"], "body": "select 1"},
+        ]
+
+    def test_bodies_per_org(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Bodies of each org are keyed and tagged with the org."""
+        stream = cast("TextBlobsStream", sigma_stream("text_blobs", org_name="eu"))
+        messages: list = []
+        monkeypatch.setattr(stream.tap, "write_message", messages.append)
+
+        digest = stream.store("select 1")
+        records = [message for message in messages if isinstance(message, RecordMessage)]
+        assert [message.record for message in records] == [
+            {"hash": digest, "body": "select 1", "_sdc_org": "eu"},
+        ]
+        assert stream.primary_keys == ["hash", "_sdc_org"]
+
+
+class TestMultiOrg:
+    """Test syncing several orgs in one process."""
+
+    ORG: ClassVar[dict[str, str]] = {
+        "name": "eu",
+        "api_url": "https://eu-api.sigmacomputing.com",
+        "client_id": "eu-client-id",
+        "client_secret": "eu-client-secret",
+    }
+
+    def test_org_streams(self) -> None:
+        """Test each org has its own API, credentials and `_sdc_org` key."""
+        tap = TapSigma(config={**SAMPLE_CONFIG, **CREDENTIALS, "orgs": [self.ORG]})
+        org_tap = tap.create_org_tap(self.ORG)
+
+        stream = sigma_stream("workbooks", tap)
+        org_stream = sigma_stream("workbooks", org_tap)
+        assert stream.org_name == "default"
+        assert org_stream.org_name == "eu"
+        assert org_stream.url_base == self.ORG["api_url"]
+        assert org_stream.primary_keys == ["workbookId", "_sdc_org"]
+        assert "_sdc_org" in org_stream.schema["properties"]
+        assert org_stream.authenticator is not stream.authenticator
+
+    def test_states_merged(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test STATE messages hold the bookmarks of every org."""
+        eu_state = {"bookmarks": {"workbooks": {"replication_key_value": "2024-01-01"}}}
+        tap = TapSigma(
+            config={**SAMPLE_CONFIG, **CREDENTIALS, "orgs": [self.ORG]},
+            state={"orgs": {"eu": eu_state}},
+        )
+        org_tap = tap.create_org_tap(self.ORG)
+        assert org_tap.state["bookmarks"]["workbooks"] == eu_state["bookmarks"]["workbooks"]
+
+        tap.write_message(StateMessage(value={"bookmarks": {"members": {}}}))
+        org_tap.write_message(StateMessage(value={"bookmarks": {"workbooks": {}}}))
+        states = [json.loads(line)["value"] for line in capsys.readouterr().out.splitlines()]
+        assert states == [
+            {"bookmarks": {"members": {}}, "orgs": {"eu": eu_state}},
+            {"bookmarks": {"members": {}}, "orgs": {"eu": {"bookmarks": {"workbooks": {}}}}},
+        ]
+
+
+class TestStateStore:
+    """Test keeping the tap state in an external store."""
+
+    def test_round_trip(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        """STATE messages hold a pointer the next run resolves to the full state."""
+        config = {**SAMPLE_CONFIG, **CREDENTIALS, "state_store_path": str(tmp_path / "state.db")}
+        tap = TapSigma(config=config)
+        state: dict[str, Any] = {
+            "bookmarks": {"workbooks": {"parent_costs": {"wb-1": {"seconds": 1.5}}}},
+            "orgs": {"eu": {"bookmarks": {"members": {}}}},
+        }
+        tap.write_message(StateMessage(value=state))
+        (message,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert list(message["value"]) == ["state_store"]
+
+        next_tap = TapSigma(config=config, state=message["value"])
+        assert next_tap.state["bookmarks"]["workbooks"] == state["bookmarks"]["workbooks"]
+        assert next_tap._org_states == state["orgs"]  # noqa: SLF001
+
+    def test_unknown_checksum(self, tmp_path: Path) -> None:
+        """A pointer to a state missing from the store is an error."""
+        config = {**SAMPLE_CONFIG, **CREDENTIALS, "state_store_path": str(tmp_path / "state.db")}
+        with pytest.raises(StateStoreError):
+            TapSigma(config=config, state={"state_store": {"checksum": "0" * 32}})
+
+
+class TestProgress:
+    """Test live progress reporting."""
+
+    def test_eta(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """The ETA extrapolates the average time per completed context."""
+        now = 1000.0
+        monkeypatch.setattr(time, "monotonic", lambda: now)
+        progress = StreamProgress("default", "workbook_columns")
+        progress.add_contexts(10)
+        for _ in range(4):
+            progress.add_request()
+            progress.complete_context()
+
+        now += 20
+        point = progress.snapshot()
+        assert point["contexts_completed"] == 4  # noqa: PLR2004
+        assert point["requests_per_second"] == 0.2  # noqa: PLR2004
+        assert point["eta_seconds"] == 30.0  # noqa: PLR2004
+
+    def test_contexts_counted(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Child contexts are counted once the parents are listed, and as parents complete."""
+        stream = sigma_stream("workbooks", progress_interval=3600)
+        records = [{"workbookId": "wb-1"}, {"workbookId": "wb-2"}]
+        monkeypatch.setattr(stream, "_get_records", lambda _: iter(records))
+        monkeypatch.setattr(RESTStream, "_sync_children", lambda *_: None)
+
+        assert list(stream.get_records(None)) == records
+        progress = sigma_stream("workbook_columns", stream.tap).progress
+        assert progress is not None
+        assert progress.contexts_total == 2  # noqa: PLR2004
+
+        stream._process_record(records[0], child_context={})  # noqa: SLF001
+        assert progress.contexts_completed == 1
+
+    def test_status_endpoint(self) -> None:
+        """The progress of each stream is served as JSON."""
+        reporter = ProgressReporter(logging.getLogger("tap-sigma"), port=0)
+        reporter.track("default", "members").add_request()
+        reporter.start()
+        try:
+            address = reporter.server_address
+            assert address is not None
+            host, port = address
+            response = requests.get(f"http://{host}:{port}/status", timeout=5)
+        finally:
+            reporter.stop()
+
+        (point,) = response.json()["streams"]
+        assert point["stream"] == "members"
+        assert point["requests"] == 1